@@ -11,7 +11,8 @@ setup(
     python_requires=">=3.11",
     install_requires=[
         "pydantic-ai>=0.0.14",
-        "pydantic>=2.0.0",
+        "pydantic>=2.11.0",
+        "orjson>=3.9.0",
         "requests>=2.31.0",
         "beautifulsoup4>=4.12.0",
         "playwright>=1.40.0",
@@ -1,19 +1,36 @@
 """Main agent for LEGO model retrieval using Pydantic AI."""
 
+import asyncio
 import hashlib
-from datetime import datetime
+import logging
+import re
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, List
+from typing import Dict, List
 
-from pydantic_ai import Agent, RunContext
+from pydantic_ai import Agent
 from pydantic_ai.models.anthropic import AnthropicModel
 from pydantic_ai.providers.anthropic import AnthropicProvider
 
 from .config import Config
-from .models import CompleteModelResult, InstructionGenerationResult, ModelRetrievalResult, ModelVariant, OMRSearchResult, PromptAnalysis
+from .disk_cache import DiskCache
+from .models import CompleteModelResult, ModelRetrievalResult, OMRSearchResult, ResultSelection
 from .omr_search import OMRSearchService
 from .leocad_service import LeoCADService
 
+logger = logging.getLogger(__name__)
+
+# Number of prompt + candidate set selections kept in memory
+SELECTION_CACHE_SIZE = 256
+
+# Characters that are unsafe in downloaded model filenames
+_FNAME_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def model_filename(result: OMRSearchResult) -> str:
+    """Filesystem-safe name for a downloaded model file."""
+    return f"{result.set_number}_{_FNAME_RE.sub('_', result.name)}.mpd"
+
 
 class LegoModelRetrievalAgent:
     """Agent for retrieving LEGO models from OMR based on user prompts."""
@@ -23,6 +40,13 @@ class LegoModelRetrievalAgent:
         self.omr_service = OMRSearchService(config)
         self.leocad_service = LeoCADService(config)
         
+        # LLM selections keyed by prompt + candidate set, in memory and on disk
+        self._selection_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._selection_disk_cache = DiskCache(config.cache_dir / "llm_sel")
+        
+        # Downloaded model files by name, so the API can serve them without scanning
+        self.file_index: Dict[str, Path] = {}
+        
         # Create the model with proper API key
         if config.anthropic_api_key:
             self.model = AnthropicModel(
@@ -31,47 +55,84 @@ class LegoModelRetrievalAgent:
             )
             # Pass the LLM to the OMR service for semantic analysis
             self.omr_service.llm = self.model
-            print(f"✅ LLM initialized: {type(self.model)}")
+            logger.info("✅ LLM initialized: %s", type(self.model))
         else:
             # Fallback to string model (will use environment variables)
             self.model = config.default_model
-            print(f"⚠️  Using fallback model: {self.model}")
+            logger.warning("⚠️  Using fallback model: %s", self.model)
+        
+        # Built once and reused for every result selection
+        try:
+            self._selection_agent = Agent(
+                model=self.model,
+                output_type=ResultSelection,
+                system_prompt="You are a LEGO model selection expert. Pick the number of the best match."
+            )
+        except Exception as e:
+            # e.g. a string model whose provider has no API key configured
+            self._selection_agent = None
+            logger.warning("⚠️  LLM selection unavailable (%s), results will be ranked by relevance score", e)
         
         # Note: We're not using the LLM agent for the core logic anymore
         # The retrieve_model method handles everything programmatically
     
+    async def aclose(self):
+        """Release pooled network resources held by the services."""
+        await self.omr_service.aclose()
+    
     # Tools are no longer needed since we handle everything programmatically
     
-    async def retrieve_model(self, user_prompt: str) -> ModelRetrievalResult:
+    async def retrieve_model(self, user_prompt: str, force_refresh: bool = False) -> ModelRetrievalResult:
         """Main method to retrieve a LEGO model based on user prompt."""
         try:
             # Step 1: Analyze the prompt
             analysis = await self.omr_service.analyze_prompt(user_prompt)
             
             # Step 2: Search OMR
-            search_results = await self.omr_service.search_omr(analysis, user_prompt)
+            search_results = await self.omr_service.search_omr(analysis, user_prompt, force_refresh=force_refresh)
             
             if not search_results:
-                return ModelRetrievalResult(
+                return ModelRetrievalResult.model_construct(
                     success=False,
                     error_message="No models found matching the search criteria",
                     search_results=[]
                 )
             
             # Step 3: Select the best result using LLM if available
-            print(f"🔍 LLM Selection Debug: model={self.model is not None}, results_count={len(search_results)}")
-            if self.model and len(search_results) > 1:
-                print(f"🤖 Using LLM to select best result from {len(search_results)} options")
-                selected_result = await self._select_best_result_with_llm(user_prompt, search_results[:5])  # Top 5 results
-            else:
-                print(f"📊 Using fallback: first result (relevance score)")
-                selected_result = search_results[0]  # Fallback to highest relevance score
+            logger.debug("🔍 LLM Selection Debug: agent=%s, results_count=%d", self._selection_agent is not None, len(search_results))
+            use_llm = self._selection_agent is not None and len(search_results) > 1
+            
+            # While the LLM ranks the candidates, speculatively fetch variants
+            # for the top few so the two latencies overlap
+            variant_tasks = {}
+            if use_llm:
+                for candidate in search_results[:3]:
+                    if candidate.set_number not in variant_tasks:
+                        variant_tasks[candidate.set_number] = asyncio.create_task(
+                            self.omr_service.get_model_variants(candidate)
+                        )
             
-            # Step 4: Get variants for the selected result
-            variants = await self.omr_service.get_model_variants(selected_result)
+            try:
+                if use_llm:
+                    logger.info("🤖 Using LLM to select best result from %d options", len(search_results))
+                    selected_result = await self._select_best_result_with_llm(user_prompt, search_results[:5])  # Top 5 results
+                else:
+                    logger.info("📊 Using fallback: first result (relevance score)")
+                    selected_result = search_results[0]  # Fallback to highest relevance score
+                
+                # Step 4: Get variants for the selected result
+                variants_task = variant_tasks.pop(selected_result.set_number, None)
+                if variants_task is not None:
+                    variants = await variants_task
+                else:
+                    variants = await self.omr_service.get_model_variants(selected_result)
+            finally:
+                # Drop speculative fetches for candidates that were not selected
+                for task in variant_tasks.values():
+                    task.cancel()
             
             if not variants:
-                return ModelRetrievalResult(
+                return ModelRetrievalResult.model_construct(
                     success=False,
                     error_message="No download variants found for the selected model",
                     search_results=search_results,
@@ -83,13 +144,14 @@ class LegoModelRetrievalAgent:
             
             # Step 6: Download the file automatically
             try:
-                filename = f"{selected_result.set_number}_{selected_result.name.replace(' ', '_')}.mpd"
+                filename = model_filename(selected_result)
                 downloaded_file = await self.omr_service.download_file(
                     selected_variant.download_url, 
                     filename
                 )
+                self.file_index[filename] = Path(downloaded_file)
                 
-                return ModelRetrievalResult(
+                return ModelRetrievalResult.model_construct(
                     success=True,
                     search_results=search_results,
                     selected_result=selected_result,
@@ -100,7 +162,7 @@ class LegoModelRetrievalAgent:
                 )
                 
             except Exception as download_error:
-                return ModelRetrievalResult(
+                return ModelRetrievalResult.model_construct(
                     success=False,
                     error_message=f"Failed to download model file: {str(download_error)}",
                     search_results=search_results,
@@ -111,28 +173,40 @@ class LegoModelRetrievalAgent:
                 )
                 
         except Exception as e:
-            return ModelRetrievalResult(
+            return ModelRetrievalResult.model_construct(
                 success=False,
                 error_message=f"Error during model retrieval: {str(e)}"
             )
     
     async def _select_best_result_with_llm(self, prompt: str, search_results: List[OMRSearchResult]) -> OMRSearchResult:
         """Use LLM to select the best result from search results based on the original prompt."""
-        print(f"🎯 LLM Selection: prompt='{prompt}', results_count={len(search_results)}")
+        logger.debug("🎯 LLM Selection: prompt=%r, results_count=%d", prompt, len(search_results))
         
         if not search_results:
-            print("❌ No search results provided")
+            logger.warning("❌ No search results provided")
             return None
         
         if len(search_results) == 1:
-            print(f"✅ Only one result, returning: {search_results[0].name}")
+            logger.info("✅ Only one result, returning: %s", search_results[0].name)
             return search_results[0]
         
+        # Reuse a previous selection for the same prompt and candidate set
+        selection_key = hashlib.sha1(
+            (prompt + "|" + ",".join(sorted(r.set_number for r in search_results))).encode()
+        ).hexdigest()
+        cached_set_number = self._selection_cache.get(selection_key) or self._selection_disk_cache.get(selection_key)
+        if cached_set_number:
+            for result in search_results:
+                if result.set_number == cached_set_number:
+                    logger.info("⚡ Using cached LLM selection: %s", result.name)
+                    self._remember_selection(selection_key, cached_set_number)
+                    return result
+        
         # Create a prompt for the LLM to select the best result
-        results_text = "\n".join([
+        results_text = "\n".join(
             f"{i+1}. {result.name} (Set: {result.set_number}) - Theme: {result.theme}"
             for i, result in enumerate(search_results)
-        ])
+        )
         
         selection_prompt = f"""
 Given the user's request: "{prompt}"
@@ -145,65 +219,56 @@ Which model (1-{len(search_results)}) best matches the user's request? Consider:
 - The theme and subject matter
 - The overall relevance to what the user is asking for
 
-Respond with just the number (1-{len(search_results)}) of the best match.
+Answer with the number (1-{len(search_results)}) of the best match.
 """
         
+        if self._selection_agent is None:
+            logger.warning("⚠️  No selection agent configured, using first result: %s", search_results[0].name)
+            return search_results[0]
+        
         try:
-            # Create a temporary agent using the Anthropic model
-            from pydantic_ai import Agent
-            agent = Agent(
-                model=self.model,  # AnthropicModel
-                system_prompt="You are a LEGO model selection expert. Respond with just a number."
-            )
-            
-            response = await agent.run(selection_prompt)
+            response = await self._selection_agent.run(selection_prompt)
             
-            # Debug: print response object details
-            print(f"🔍 LLM Selection Response Debug: type={type(response)}")
-            print(f"🔍 Response attributes: {dir(response)}")
-            print(f"🔍 Response content: {response}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("🔍 LLM Selection Response Debug: type=%s", type(response))
+                logger.debug("🔍 Response content: %r", response)
             
-            # Use the output attribute (this is the correct one for AgentRunResult)
-            if hasattr(response, "output"):
-                output_text = response.output
-                print(f"✅ Using output attribute")
-            else:
-                print(f"❌ No output attribute found")
-                raise ValueError("No output attribute in LLM response")
+            # The output is already validated into a ResultSelection
+            selection_index = response.output.choice - 1  # Convert to 0-based index
+            if 0 <= selection_index < len(search_results):
+                selected_result = search_results[selection_index]
+                logger.info("🤖 LLM selected: %s (option %d)", selected_result.name, selection_index + 1)
+                self._remember_selection(selection_key, selected_result.set_number)
+                self._selection_disk_cache.set(selection_key, selected_result.set_number)
+                return selected_result
             
-            selection_text = output_text.strip()
-            
-            # Extract the number from the response
-            import re
-            match = re.search(r'\b(\d+)\b', selection_text)
-            if match:
-                selection_index = int(match.group(1)) - 1  # Convert to 0-based index
-                if 0 <= selection_index < len(search_results):
-                    selected_result = search_results[selection_index]
-                    print(f"🤖 LLM selected: {selected_result.name} (option {selection_index + 1})")
-                    return selected_result
-            
-            print(f"⚠️  LLM selection failed, using first result: {search_results[0].name}")
+            logger.warning("⚠️  LLM selection failed, using first result: %s", search_results[0].name)
             return search_results[0]
             
         except Exception as e:
-            print(f"⚠️  LLM selection error: {e}, using first result: {search_results[0].name}")
+            logger.warning("⚠️  LLM selection error: %s, using first result: %s", e, search_results[0].name)
             return search_results[0]
     
+    def _remember_selection(self, selection_key: str, set_number: str):
+        """Keep a selection in the in-memory LRU, evicting the least recently used."""
+        self._selection_cache[selection_key] = set_number
+        self._selection_cache.move_to_end(selection_key)
+        while len(self._selection_cache) > SELECTION_CACHE_SIZE:
+            self._selection_cache.popitem(last=False)
+    
     async def retrieve_model_sync(self, user_prompt: str) -> ModelRetrievalResult:
         """Synchronous version of retrieve_model."""
         return await self.retrieve_model(user_prompt)
     
-    async def retrieve_model_with_instructions(self, user_prompt: str) -> CompleteModelResult:
+    async def retrieve_model_with_instructions(self, user_prompt: str, force_refresh: bool = False) -> CompleteModelResult:
         """Complete process: retrieve model and generate instructions."""
         # Step 1: Retrieve the model
-        retrieval_result = await self.retrieve_model(user_prompt)
+        retrieval_result = await self.retrieve_model(user_prompt, force_refresh=force_refresh)
         
         if not retrieval_result.success or not retrieval_result.downloaded_file_path:
-            return CompleteModelResult(
+            return CompleteModelResult.model_construct(
                 retrieval_result=retrieval_result,
-                instruction_result=None,
-                summary=f"❌ Model retrieval failed: {retrieval_result.error_message}"
+                instruction_result=None
             )
         
         # Step 2: Generate instructions
@@ -212,42 +277,7 @@ Respond with just the number (1-{len(search_results)}) of the best match.
             model_info=retrieval_result.selected_result
         )
         
-        # Step 3: Create summary
-        summary = self._create_summary(retrieval_result, instruction_result)
-        
-        return CompleteModelResult(
+        return CompleteModelResult.model_construct(
             retrieval_result=retrieval_result,
-            instruction_result=instruction_result,
-            summary=summary
+            instruction_result=instruction_result
         )
-    
-    def _create_summary(self, retrieval_result: ModelRetrievalResult, instruction_result: InstructionGenerationResult) -> str:
-        """Create a human-readable summary of the complete process."""
-        summary_parts = []
-        
-        # Model retrieval summary
-        if retrieval_result.success and retrieval_result.selected_result:
-            model_name = retrieval_result.selected_result.name
-            set_number = retrieval_result.selected_result.set_number
-            summary_parts.append(f"✅ Found model: {set_number} - {model_name}")
-        else:
-            summary_parts.append("❌ Model retrieval failed")
-            return " ".join(summary_parts)
-        
-        # Instruction generation summary
-        if instruction_result.success:
-            if instruction_result.step_count > 0:
-                step_count = len(instruction_result.step_images)
-                summary_parts.append(f"✅ Generated {step_count} step images")
-            else:
-                summary_parts.append("✅ No steps found in model")
-            
-            if instruction_result.bom_csv:
-                summary_parts.append("✅ Generated BOM CSV")
-            
-            if instruction_result.html_export:
-                summary_parts.append("✅ Generated HTML export")
-        else:
-            summary_parts.append(f"❌ Instruction generation failed: {instruction_result.error_message}")
-        
-        return " | ".join(summary_parts)
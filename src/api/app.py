@@ -1,12 +1,15 @@
 """FastAPI application for Brick Kit."""
 
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
 
-from .routes import router, set_agent
+from .routes import DEFAULT_RESPONSE_CLASS, router, set_agent
 from ..agent import LegoModelRetrievalAgent
+from ..browser_pool import close_browser, get_browser
 from ..config import Config
 
 
@@ -18,7 +21,8 @@ def create_app() -> FastAPI:
         description="AI-powered LEGO build agent using Pydantic AI",
         version="0.1.0",
         docs_url="/docs",
-        redoc_url="/redoc"
+        redoc_url="/redoc",
+        default_response_class=DEFAULT_RESPONSE_CLASS
     )
     
     # Add CORS middleware
@@ -28,8 +32,12 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        max_age=86400,  # Let browsers cache preflight responses for a day
     )
     
+    # Compress larger JSON payloads; level 5 keeps the CPU cost low
+    app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+    
     # Include API routes
     app.include_router(router, prefix="/api/v1")
     
@@ -104,6 +112,7 @@ async def initialize_agent(app: FastAPI):
         config = Config.from_env()
         agent = LegoModelRetrievalAgent(config)
         set_agent(agent)
+        app.state.agent = agent
         print("✅ Agent initialized successfully")
     except Exception as e:
         print(f"❌ Failed to initialize agent: {e}")
@@ -116,6 +125,21 @@ def create_app_with_agent() -> FastAPI:
     
     @app.on_event("startup")
     async def startup_event():
+        # Sync file-serving routes run in the AnyIO threadpool; raise its 40-thread cap
+        anyio.to_thread.current_default_thread_limiter().total_tokens = 200
         await initialize_agent(app)
+        # Warm up the shared browser so requests only pay for a new context; hosts without
+        # Playwright browsers still serve health and cached files, and scraping launches lazily
+        try:
+            await get_browser()
+        except Exception as e:
+            print(f"⚠️  Could not launch the shared browser at startup: {e}")
+    
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        agent = getattr(app.state, "agent", None)
+        if agent is not None:
+            await agent.aclose()
+        await close_browser()
     
     return app
@@ -1,10 +1,9 @@
 """API request and response models for Brick Kit."""
 
-from datetime import datetime
-from pathlib import Path
+from datetime import datetime, timezone
 from typing import List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class ModelRetrievalRequest(BaseModel):
@@ -13,25 +12,14 @@ class ModelRetrievalRequest(BaseModel):
     prompt: str = Field(..., description="Natural language description of desired LEGO model")
     max_results: int = Field(default=10, ge=1, le=50, description="Maximum number of search results to return")
     include_variants: bool = Field(default=True, description="Whether to include model variants in search")
-
-
-class ModelRetrievalResponse(BaseModel):
-    """Response model for LEGO model retrieval."""
-    
-    success: bool = Field(..., description="Whether the retrieval was successful")
-    message: str = Field(..., description="Human-readable message about the result")
-    search_results: List["SearchResultResponse"] = Field(default_factory=list, description="Search results found")
-    selected_result: Optional["SearchResultResponse"] = Field(None, description="Selected result")
-    variants_found: List["ModelVariantResponse"] = Field(default_factory=list, description="Available variants")
-    selected_variant: Optional["ModelVariantResponse"] = Field(None, description="Selected variant")
-    download_url: Optional[str] = Field(None, description="Download URL for the selected variant")
-    error_details: Optional[str] = Field(None, description="Detailed error information if failed")
-    processing_time_seconds: float = Field(..., description="Time taken to process the request")
+    force_refresh: bool = Field(default=False, description="Bypass cached OMR search results and scrape again")
 
 
 class SearchResultResponse(BaseModel):
     """Response model for individual search results."""
     
+    model_config = ConfigDict(frozen=True, extra="ignore")
+    
     set_number: str = Field(..., description="LEGO set number")
     name: str = Field(..., description="Set name")
     theme: str = Field(..., description="Set theme")
@@ -43,12 +31,31 @@ class SearchResultResponse(BaseModel):
 class ModelVariantResponse(BaseModel):
     """Response model for model variants."""
     
+    model_config = ConfigDict(frozen=True, extra="ignore")
+    
     name: str = Field(..., description="Variant name")
     download_url: str = Field(..., description="Download URL")
     file_type: str = Field(..., description="File type (mpd, zip)")
     relevance_score: float = Field(..., description="Relevance score")
 
 
+class ModelRetrievalResponse(BaseModel):
+    """Response model for LEGO model retrieval."""
+    
+    # Built from already-validated domain objects and never modified afterwards
+    model_config = ConfigDict(frozen=True, extra="ignore")
+    
+    success: bool = Field(..., description="Whether the retrieval was successful")
+    message: str = Field(..., description="Human-readable message about the result")
+    search_results: List[SearchResultResponse] = Field(default_factory=list, description="Search results found")
+    selected_result: Optional[SearchResultResponse] = Field(None, description="Selected result")
+    variants_found: List[ModelVariantResponse] = Field(default_factory=list, description="Available variants")
+    selected_variant: Optional[ModelVariantResponse] = Field(None, description="Selected variant")
+    download_url: Optional[str] = Field(None, description="Download URL for the selected variant")
+    error_details: Optional[str] = Field(None, description="Detailed error information if failed")
+    processing_time_seconds: float = Field(..., description="Time taken to process the request")
+
+
 class PromptAnalysisRequest(BaseModel):
     """Request model for prompt analysis."""
     
@@ -69,7 +76,7 @@ class HealthResponse(BaseModel):
     
     status: str = Field(..., description="Service status")
     version: str = Field(..., description="Service version")
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 
 class WebSocketMessage(BaseModel):
@@ -77,7 +84,7 @@ class WebSocketMessage(BaseModel):
     
     type: str = Field(..., description="Message type")
     data: dict = Field(..., description="Message data")
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 
 class InstructionGenerationRequest(BaseModel):
@@ -85,20 +92,23 @@ class InstructionGenerationRequest(BaseModel):
     
     prompt: str = Field(..., description="Natural language description of desired LEGO model")
     max_results: int = Field(default=10, ge=1, le=50, description="Maximum number of search results to return")
+    force_refresh: bool = Field(default=False, description="Bypass cached OMR search results and scrape again")
 
 
 class InstructionGenerationResponse(BaseModel):
     """Response model for complete model retrieval with instructions."""
     
+    model_config = ConfigDict(frozen=True, extra="ignore")
+    
     success: bool = Field(..., description="Whether the complete process was successful")
     message: str = Field(..., description="Human-readable message about the result")
     summary: str = Field(..., description="Summary of the complete process")
     
     # Model retrieval results
-    search_results: List["SearchResultResponse"] = Field(default_factory=list, description="Search results found")
-    selected_result: Optional["SearchResultResponse"] = Field(None, description="Selected result")
-    variants_found: List["ModelVariantResponse"] = Field(default_factory=list, description="Available variants")
-    selected_variant: Optional["ModelVariantResponse"] = Field(None, description="Selected variant")
+    search_results: List[SearchResultResponse] = Field(default_factory=list, description="Search results found")
+    selected_result: Optional[SearchResultResponse] = Field(None, description="Selected result")
+    variants_found: List[ModelVariantResponse] = Field(default_factory=list, description="Available variants")
+    selected_variant: Optional[ModelVariantResponse] = Field(None, description="Selected variant")
     download_url: Optional[str] = Field(None, description="Download URL for the selected variant")
     downloaded_file_path: Optional[str] = Field(None, description="Local path to downloaded MPD file")
     
@@ -113,7 +123,3 @@ class InstructionGenerationResponse(BaseModel):
     
     error_details: Optional[str] = Field(None, description="Detailed error information if failed")
     processing_time_seconds: float = Field(..., description="Time taken to process the request")
-
-
-# Update forward references
-ModelRetrievalResponse.model_rebuild()
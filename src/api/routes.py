@@ -1,11 +1,15 @@
 """FastAPI routes for Brick Kit API."""
 
 import asyncio
+import os
 import time
+from datetime import datetime, timezone
+from pathlib import Path
 from typing import Dict, Any
 
-from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
 
 from .models import (
     ModelRetrievalRequest,
@@ -19,39 +23,171 @@ from .models import (
     InstructionGenerationRequest,
     InstructionGenerationResponse,
 )
-from ..agent import LegoModelRetrievalAgent
+from ..agent import LegoModelRetrievalAgent, model_filename
+from ..models import MODEL_VARIANTS_ADAPTER, OMR_RESULTS_ADAPTER
 from ..config import Config
 
 
+# Progress updates arriving within this window are coalesced into the latest one
+PROGRESS_DEBOUNCE_SECONDS = 0.025
+
+
 class ConnectionManager:
     """Manages WebSocket connections for real-time updates."""
     
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
+        self._pending_progress: Dict[str, WebSocketMessage] = {}
+        self._flush_tasks: Dict[str, asyncio.Task] = {}
     
     async def connect(self, websocket: WebSocket, client_id: str):
         await websocket.accept()
         self.active_connections[client_id] = websocket
     
     def disconnect(self, client_id: str):
-        if client_id in self.active_connections:
-            del self.active_connections[client_id]
+        self.active_connections.pop(client_id, None)
+        self._pending_progress.pop(client_id, None)
+        task = self._flush_tasks.pop(client_id, None)
+        if task is not None:
+            task.cancel()
     
     async def send_message(self, client_id: str, message: WebSocketMessage):
-        if client_id in self.active_connections:
-            websocket = self.active_connections[client_id]
-            try:
-                await websocket.send_json(message.model_dump())
-            except Exception:
-                # Connection might be closed, remove it
+        if client_id not in self.active_connections:
+            return
+        
+        if message.type == "progress":
+            # Keep only the newest progress update and send it after a short debounce
+            self._pending_progress[client_id] = message
+            if client_id not in self._flush_tasks:
+                self._flush_tasks[client_id] = asyncio.create_task(self._flush_progress(client_id))
+            return
+        
+        # Anything else goes out immediately, after any progress still queued
+        await self._flush_pending(client_id)
+        await self._send_payload(client_id, message.model_dump_json())
+    
+    async def _flush_progress(self, client_id: str):
+        await asyncio.sleep(PROGRESS_DEBOUNCE_SECONDS)
+        self._flush_tasks.pop(client_id, None)
+        message = self._pending_progress.pop(client_id, None)
+        if message is not None:
+            await self._send_payload(client_id, message.model_dump_json())
+    
+    async def _flush_pending(self, client_id: str):
+        task = self._flush_tasks.pop(client_id, None)
+        if task is not None:
+            task.cancel()
+        message = self._pending_progress.pop(client_id, None)
+        if message is not None:
+            await self._send_payload(client_id, message.model_dump_json())
+    
+    async def _send_payload(self, client_id: str, payload: str):
+        websocket = self.active_connections.get(client_id)
+        if websocket is None:
+            return
+        try:
+            # The message is serialized once, straight to JSON text in pydantic-core
+            await websocket.send_text(payload)
+        except Exception:
+            # Connection might be closed, remove it - unless the client has
+            # already reconnected under the same id while this send was pending
+            if self.active_connections.get(client_id) is websocket:
                 self.disconnect(client_id)
 
 
+# Serialize responses with orjson. Recent FastAPI releases already encode
+# response models straight to JSON bytes via Pydantic and deprecate this class,
+# so only opt in where it is still the faster path.
+if getattr(ORJSONResponse, "__deprecated__", None):
+    DEFAULT_RESPONSE_CLASS = JSONResponse
+else:
+    DEFAULT_RESPONSE_CLASS = ORJSONResponse
+
+
+def _render_with_lists(response: BaseModel, search_results: list, variants_found: list) -> Response:
+    """Serialize a retrieval response, splicing in the result lists as pre-encoded JSON."""
+    # The domain models carry exactly the fields of SearchResultResponse and
+    # ModelVariantResponse, so their lists can be dumped to JSON in one Rust call
+    envelope = response.model_dump_json(exclude={"search_results", "variants_found"})
+    content = b"".join((
+        b'{"search_results":', OMR_RESULTS_ADAPTER.dump_json(search_results),
+        b',"variants_found":', MODEL_VARIANTS_ADAPTER.dump_json(variants_found),
+        b",", envelope[1:].encode(),
+    ))
+    return Response(content=content, media_type="application/json")
+
+
+def _search_result_response(r) -> SearchResultResponse:
+    """Copy an already-validated search result into its response model without revalidating."""
+    return SearchResultResponse.model_construct(
+        set_number=r.set_number,
+        name=r.name,
+        theme=r.theme,
+        year=r.year,
+        detail_url=r.detail_url,
+        relevance_score=r.relevance_score
+    )
+
+
+def _variant_response(v) -> ModelVariantResponse:
+    """Copy an already-validated model variant into its response model without revalidating."""
+    return ModelVariantResponse.model_construct(
+        name=v.name,
+        download_url=v.download_url,
+        file_type=v.file_type,
+        relevance_score=v.relevance_score
+    )
+
+
+# Media types served by the download endpoint, keyed by file suffix
+MEDIA_TYPES = {
+    ".mpd": "text/plain",  # MPD files are text-based
+    ".png": "image/png",
+    ".csv": "text/csv",
+    ".pdf": "application/pdf",
+    ".html": "text/html",
+}
+
+# Files above this size are streamed in larger reads to cut per-chunk overhead
+LARGE_FILE_CHUNK_SIZE = 1 << 20
+
+
+# Output files can be regenerated under the same name, so clients revalidate
+# against the ETag instead of caching blindly
+DOWNLOAD_CACHE_CONTROL = "public, no-cache"
+
+
+def _file_response(request: Request, path: Path, stat_result: os.stat_result, **kwargs) -> Response:
+    """Build a FileResponse from an existing stat, or a 304 if the client's copy is current."""
+    response = FileResponse(path=str(path), stat_result=stat_result, **kwargs)
+    response.headers["Cache-Control"] = DOWNLOAD_CACHE_CONTROL
+    
+    # FileResponse derives the ETag from size and mtime
+    etag = response.headers["etag"]
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(","))):
+        return Response(
+            status_code=304,
+            headers={
+                "ETag": etag,
+                "Last-Modified": response.headers["last-modified"],
+                "Cache-Control": DOWNLOAD_CACHE_CONTROL,
+            }
+        )
+    
+    if stat_result.st_size > LARGE_FILE_CHUNK_SIZE:
+        response.chunk_size = LARGE_FILE_CHUNK_SIZE
+    return response
+
+
+# Constant head of the /health payload, completed with a timestamp per request
+_HEALTH_PREFIX = b'{"status":"healthy","version":"0.1.0","timestamp":"'
+
 # Global connection manager
 manager = ConnectionManager()
 
 # Create router
-router = APIRouter()
+router = APIRouter(default_response_class=DEFAULT_RESPONSE_CLASS)
 
 # Global agent instance (will be initialized in main.py)
 agent: LegoModelRetrievalAgent = None
@@ -60,10 +196,9 @@ agent: LegoModelRetrievalAgent = None
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint."""
-    return HealthResponse(
-        status="healthy",
-        version="0.1.0"
-    )
+    # Only the timestamp changes between polls; the rest is encoded once at import
+    timestamp = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    return Response(content=_HEALTH_PREFIX + timestamp.encode() + b'"}', media_type="application/json")
 
 
 @router.post("/analyze-prompt", response_model=PromptAnalysisResponse)
@@ -94,64 +229,29 @@ async def retrieve_model(request: ModelRetrievalRequest):
     
     try:
         # Run the agent
-        result = await agent.retrieve_model(request.prompt)
+        result = await agent.retrieve_model(request.prompt, force_refresh=request.force_refresh)
         
         processing_time = time.time() - start_time
         
         # Convert to API response format
-        search_results = [
-            SearchResultResponse(
-                set_number=r.set_number,
-                name=r.name,
-                theme=r.theme,
-                year=r.year,
-                detail_url=r.detail_url,
-                relevance_score=r.relevance_score
-            )
-            for r in result.search_results[:request.max_results]
-        ]
-        
-        selected_result = None
-        if result.selected_result:
-            selected_result = SearchResultResponse(
-                set_number=result.selected_result.set_number,
-                name=result.selected_result.name,
-                theme=result.selected_result.theme,
-                year=result.selected_result.year,
-                detail_url=result.selected_result.detail_url,
-                relevance_score=result.selected_result.relevance_score
-            )
+        selected_result = _search_result_response(result.selected_result) if result.selected_result else None
         
-        variants_found = [
-            ModelVariantResponse(
-                name=v.name,
-                download_url=v.download_url,
-                file_type=v.file_type,
-                relevance_score=v.relevance_score
-            )
-            for v in result.variants_found
-        ]
-        
-        selected_variant = None
-        if result.selected_variant:
-            selected_variant = ModelVariantResponse(
-                name=result.selected_variant.name,
-                download_url=result.selected_variant.download_url,
-                file_type=result.selected_variant.file_type,
-                relevance_score=result.selected_variant.relevance_score
-            )
+        selected_variant = _variant_response(result.selected_variant) if result.selected_variant else None
         
-        return ModelRetrievalResponse(
+        response = ModelRetrievalResponse.model_construct(
             success=result.success,
             message="Model found successfully" if result.success else result.error_message or "Unknown error",
-            search_results=search_results,
             selected_result=selected_result,
-            variants_found=variants_found,
             selected_variant=selected_variant,
             download_url=result.download_url,
             error_details=result.error_message if not result.success else None,
             processing_time_seconds=processing_time
         )
+        return _render_with_lists(
+            response,
+            result.search_results[:request.max_results],
+            result.variants_found
+        )
         
     except Exception as e:
         processing_time = time.time() - start_time
@@ -172,52 +272,14 @@ async def retrieve_model_with_instructions(request: InstructionGenerationRequest
     
     try:
         # Run the complete process
-        result = await agent.retrieve_model_with_instructions(request.prompt)
+        result = await agent.retrieve_model_with_instructions(request.prompt, force_refresh=request.force_refresh)
         
         processing_time = time.time() - start_time
         
         # Convert to API response format
-        search_results = [
-            SearchResultResponse(
-                set_number=r.set_number,
-                name=r.name,
-                theme=r.theme,
-                year=r.year,
-                detail_url=r.detail_url,
-                relevance_score=r.relevance_score
-            )
-            for r in result.retrieval_result.search_results[:request.max_results]
-        ]
-        
-        selected_result = None
-        if result.retrieval_result.selected_result:
-            selected_result = SearchResultResponse(
-                set_number=result.retrieval_result.selected_result.set_number,
-                name=result.retrieval_result.selected_result.name,
-                theme=result.retrieval_result.selected_result.theme,
-                year=result.retrieval_result.selected_result.year,
-                detail_url=result.retrieval_result.selected_result.detail_url,
-                relevance_score=result.retrieval_result.selected_result.relevance_score
-            )
+        selected_result = _search_result_response(result.retrieval_result.selected_result) if result.retrieval_result.selected_result else None
         
-        variants_found = [
-            ModelVariantResponse(
-                name=v.name,
-                download_url=v.download_url,
-                file_type=v.file_type,
-                relevance_score=v.relevance_score
-            )
-            for v in result.retrieval_result.variants_found
-        ]
-        
-        selected_variant = None
-        if result.retrieval_result.selected_variant:
-            selected_variant = ModelVariantResponse(
-                name=result.retrieval_result.selected_variant.name,
-                download_url=result.retrieval_result.selected_variant.download_url,
-                file_type=result.retrieval_result.selected_variant.file_type,
-                relevance_score=result.retrieval_result.selected_variant.relevance_score
-            )
+        selected_variant = _variant_response(result.retrieval_result.selected_variant) if result.retrieval_result.selected_variant else None
         
         # Instruction results
         instruction_success = False
@@ -237,13 +299,11 @@ async def retrieve_model_with_instructions(request: InstructionGenerationRequest
             pdf_instructions = result.instruction_result.pdf_instructions
             step_count = result.instruction_result.step_count
         
-        return InstructionGenerationResponse(
+        response = InstructionGenerationResponse.model_construct(
             success=result.retrieval_result.success and instruction_success,
             message="Model found and instructions generated successfully" if (result.retrieval_result.success and instruction_success) else result.retrieval_result.error_message or "Unknown error",
             summary=result.summary,
-            search_results=search_results,
             selected_result=selected_result,
-            variants_found=variants_found,
             selected_variant=selected_variant,
             download_url=result.retrieval_result.download_url,
             downloaded_file_path=result.retrieval_result.downloaded_file_path,
@@ -257,6 +317,11 @@ async def retrieve_model_with_instructions(request: InstructionGenerationRequest
             error_details=result.retrieval_result.error_message if not result.retrieval_result.success else instruction_error,
             processing_time_seconds=processing_time
         )
+        return _render_with_lists(
+            response,
+            result.retrieval_result.search_results[:request.max_results],
+            result.retrieval_result.variants_found
+        )
         
     except Exception as e:
         processing_time = time.time() - start_time
@@ -293,7 +358,7 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
                     # Send final result
                     await manager.send_message(client_id, WebSocketMessage(
                         type="result",
-                        data=result.model_dump()
+                        data=result
                     ))
             
     except WebSocketDisconnect:
@@ -326,17 +391,25 @@ async def retrieve_model_with_progress(client_id: str, prompt: str):
             data={"message": "Searching OMR database...", "step": 2, "total": 5}
         ))
         
-        search_results = await agent.omr_service.search_omr(analysis)
+        search_results = await agent.omr_service.search_omr(analysis, prompt)
         
-        # Step 3: Get variants
-        await manager.send_message(client_id, WebSocketMessage(
-            type="progress",
-            data={"message": "Finding model variants...", "step": 3, "total": 5}
-        ))
-        
-        variants = []
+        # Start the variant lookup for the top result straight away; progress
+        # updates are queued without waiting on the socket, so nothing gates it
+        variants_task = None
         if search_results:
-            variants = await agent.omr_service.get_model_variants(search_results[0])
+            variants_task = asyncio.create_task(agent.omr_service.get_model_variants(search_results[0]))
+        
+        try:
+            # Step 3: Get variants
+            await manager.send_message(client_id, WebSocketMessage(
+                type="progress",
+                data={"message": "Finding model variants...", "step": 3, "total": 5}
+            ))
+            
+            variants = await variants_task if variants_task is not None else []
+        finally:
+            if variants_task is not None and not variants_task.done():
+                variants_task.cancel()
         
         # Step 4: Download model
         await manager.send_message(client_id, WebSocketMessage(
@@ -346,7 +419,9 @@ async def retrieve_model_with_progress(client_id: str, prompt: str):
         
         cached_file_path = None
         if variants:
-            cached_file_path = await agent.omr_service.download_model(variants[0])
+            filename = model_filename(search_results[0])
+            cached_file_path = await agent.omr_service.download_file(variants[0].download_url, filename)
+            agent.file_index[filename] = Path(cached_file_path)
         
         # Step 5: Complete
         await manager.send_message(client_id, WebSocketMessage(
@@ -371,37 +446,45 @@ async def retrieve_model_with_progress(client_id: str, prompt: str):
 
 
 @router.get("/download/{file_hash}")
-async def download_cached_file(file_hash: str):
-    """Download a cached model file."""
+def download_cached_file(file_hash: str, request: Request):
+    """Download a cached model file (sync, so FastAPI runs it in the threadpool)."""
     if not agent:
         raise HTTPException(status_code=503, detail="Agent not initialized")
     
     try:
-        # Look for files in the output directory
-        output_dir = agent.config.output_dir
-        files = list(output_dir.glob("*"))
-        
-        # Find file by hash or name
-        target_file = None
-        for file_path in files:
-            if file_hash in file_path.name or file_path.name == file_hash:
-                target_file = file_path
-                break
-        
-        if not target_file or not target_file.exists():
+        # Files the agent downloaded are indexed by name; fall back to a scan
+        # of the output directory for anything written outside this process
+        target_file = agent.file_index.get(file_hash)
+        if target_file is None:
+            # This handler runs in the threadpool while the event loop may add to the index,
+            # so match against a snapshot; in-flight ".part" downloads are never served
+            target_file = next(
+                (path for name, path in tuple(agent.file_index.items())
+                 if file_hash in name and not name.endswith(".part")),
+                None
+            )
+        if target_file is None:
+            with os.scandir(agent.config.output_dir) as entries:
+                for entry in entries:
+                    if file_hash in entry.name and not entry.name.endswith(".part"):
+                        target_file = Path(entry.path)
+                        break
+        
+        # One stat serves both the existence check and FileResponse's headers
+        try:
+            stat_result = os.stat(target_file) if target_file else None
+        except FileNotFoundError:
+            stat_result = None
+        if stat_result is None:
             raise HTTPException(status_code=404, detail="File not found")
         
         # Determine media type based on file extension
-        media_type = "application/octet-stream"
-        if target_file.suffix == ".mpd":
-            media_type = "text/plain"  # MPD files are text-based
-        elif target_file.suffix == ".png":
-            media_type = "image/png"
-        elif target_file.suffix == ".csv":
-            media_type = "text/csv"
-        
-        response = FileResponse(
-            path=str(target_file),
+        media_type = MEDIA_TYPES.get(os.path.splitext(target_file.name)[1], "application/octet-stream")
+        
+        response = _file_response(
+            request,
+            target_file,
+            stat_result,
             media_type=media_type,
             filename=target_file.name
         )
@@ -424,8 +507,10 @@ async def cleanup_outputs():
         raise HTTPException(status_code=503, detail="Agent not initialized")
     
     try:
-        # Call the cleanup function from the LeoCAD service
-        agent.leocad_service._cleanup_old_outputs()
+        # Call the cleanup function from the LeoCAD service off the event loop
+        await agent.leocad_service.cleanup_old_outputs()
+        # Every downloaded model file is gone now
+        agent.file_index.clear()
         
         return {
             "success": True,
@@ -437,36 +522,52 @@ async def cleanup_outputs():
 
 
 @router.get("/download-pdf/{model_id}")
-async def download_pdf(model_id: str):
-    """Download PDF instructions for a specific model."""
+def download_pdf(model_id: str, request: Request):
+    """Download PDF instructions for a specific model (sync, runs in the threadpool)."""
     if not agent:
         raise HTTPException(status_code=503, detail="Agent not initialized")
     
     try:
-        # Look for PDF files in the output directory
-        output_dir = agent.config.output_dir / "instructions"
-        pdf_files = list(output_dir.glob("*.pdf"))
-        
-        if not pdf_files:
-            raise HTTPException(status_code=404, detail="No PDF instructions found")
-        
-        # Try to find a PDF that matches the model_id
+        # Look for PDF files in the output directory, finding a PDF that
+        # matches the model_id and the most recent PDF in a single pass
+        output_dir = agent.config.instructions_dir
+        # Each DirEntry is stat'ed at most once and that stat is reused for the response
         matching_pdf = None
-        for pdf_file in pdf_files:
-            if model_id in pdf_file.name:
-                matching_pdf = pdf_file
-                break
+        newest_pdf = None
+        newest_stat = None
+        found_any = False
+        try:
+            with os.scandir(output_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".pdf"):
+                        continue
+                    found_any = True
+                    try:
+                        entry_stat = entry.stat()
+                    except FileNotFoundError:
+                        continue  # Removed between listing and stat
+                    if model_id in entry.name:
+                        matching_pdf, stat_result = Path(entry.path), entry_stat
+                        break
+                    if newest_stat is None or entry_stat.st_mtime > newest_stat.st_mtime:
+                        newest_pdf, newest_stat = Path(entry.path), entry_stat
+        except FileNotFoundError:
+            pass
+        
+        if not found_any:
+            raise HTTPException(status_code=404, detail="No PDF instructions found")
         
-        # If no specific match, use the most recent PDF
         if not matching_pdf:
-            matching_pdf = max(pdf_files, key=lambda f: f.stat().st_mtime)
-        
-        if not matching_pdf.exists():
-            raise HTTPException(status_code=404, detail="PDF file not found")
+            # If no specific match, use the most recent PDF
+            if newest_pdf is None:
+                raise HTTPException(status_code=404, detail="PDF file not found")
+            matching_pdf, stat_result = newest_pdf, newest_stat
         
         # Return the PDF file
-        response = FileResponse(
-            path=str(matching_pdf),
+        response = _file_response(
+            request,
+            matching_pdf,
+            stat_result,
             media_type="application/pdf",
             filename=matching_pdf.name,
             headers={"Content-Disposition": f"attachment; filename={matching_pdf.name}"}
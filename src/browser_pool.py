@@ -0,0 +1,57 @@
+"""Shared Playwright browser for OMR scraping and debug scripts."""
+
+import asyncio
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, Playwright
+
+
+class BrowserPool:
+    """Keeps one headless Chromium process alive and hands out fresh contexts."""
+
+    def __init__(self):
+        self._playwright: Optional["Playwright"] = None
+        self._browser: Optional["Browser"] = None
+        self._lock = asyncio.Lock()
+
+    async def get_browser(self) -> "Browser":
+        """Return the shared browser, launching it on first use."""
+        async with self._lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._playwright is None:
+                    # Imported here so merely importing this module stays cheap
+                    from playwright.async_api import async_playwright
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=True)
+                print("🌐 Launched shared Chromium browser")
+        return self._browser
+
+    async def new_context(self) -> "BrowserContext":
+        """Create an isolated context on the shared browser (close it when done)."""
+        browser = await self.get_browser()
+        return await browser.new_context()
+
+    async def close(self) -> None:
+        """Close the browser and stop the Playwright driver."""
+        async with self._lock:
+            if self._browser is not None:
+                await self._browser.close()
+                self._browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+
+# Process-wide pool shared by the API, the agent and the debug scripts
+browser_pool = BrowserPool()
+
+
+async def get_browser() -> "Browser":
+    """Return the process-wide shared browser."""
+    return await browser_pool.get_browser()
+
+
+async def close_browser() -> None:
+    """Shut down the process-wide shared browser."""
+    await browser_pool.close()
@@ -1,10 +1,12 @@
 """CLI interface for direct agent usage."""
 
 import asyncio
+import logging
 import sys
 from pathlib import Path
 
 from .agent import LegoModelRetrievalAgent
+from .browser_pool import close_browser
 from .config import Config
 
 
@@ -26,6 +28,9 @@ async def main():
     
     user_prompt = " ".join(args)
     
+    # Surface the agent's progress messages on the console
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     # Load configuration
     try:
         config = Config.from_env()
@@ -36,7 +41,15 @@ async def main():
     
     # Create and run the agent
     agent = LegoModelRetrievalAgent(config)
-    
+    try:
+        await _run(agent, user_prompt, generate_instructions)
+    finally:
+        await agent.aclose()
+        await close_browser()
+
+
+async def _run(agent: LegoModelRetrievalAgent, user_prompt: str, generate_instructions: bool):
+    """Run a single retrieval and print the outcome."""
     if generate_instructions:
         print(f"Searching for LEGO model and generating instructions: '{user_prompt}'")
         print("This may take several minutes...")
@@ -95,4 +108,10 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        # libuv-based event loop; the pipeline is dominated by socket and subprocess I/O
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
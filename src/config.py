@@ -1,6 +1,7 @@
 """Configuration management for Brick Kit."""
 
 import os
+from functools import cached_property, lru_cache
 from pathlib import Path
 from typing import Optional
 
@@ -19,9 +20,14 @@ class Config(BaseModel):
     # Output settings
     output_dir: Path = Field(default=Path("omr_output"))
     
+    # Cache settings
+    cache_dir: Path = Field(default=Path.home() / ".brickkit" / "cache", description="Directory for on-disk caches")
+    omr_cache_ttl: int = Field(default=86400, description="Lifetime of cached OMR search results in seconds")
+    
     # OMR settings
     omr_base_url: str = Field(default="https://library.ldraw.org/omr")
     omr_search_url: str = Field(default="https://library.ldraw.org/omr/sets")
+    debug: bool = Field(default=False, description="Print page diagnostics while scraping OMR")
     
     # Model settings
     default_model: str = Field(default="anthropic:claude-sonnet-4-5")
@@ -40,27 +46,41 @@ class Config(BaseModel):
     
     @classmethod
     def from_env(cls) -> "Config":
-        """Load configuration from environment variables."""
-        load_dotenv()
-        
-        return cls(
-            openai_api_key=os.getenv("OPENAI_API_KEY"),
-            anthropic_api_key=os.getenv("ANTHROPIC_API_KEY"),
-            google_api_key=os.getenv("GOOGLE_API_KEY"),
-            output_dir=Path(os.getenv("OUTPUT_DIR", "omr_output")),
-            omr_base_url=os.getenv("OMR_BASE_URL", "https://library.ldraw.org/omr"),
-            omr_search_url=os.getenv("OMR_SEARCH_URL", "https://library.ldraw.org/omr/sets"),
-            default_model=os.getenv("DEFAULT_MODEL", "anthropic:claude-sonnet-4-5"),
-            temperature=float(os.getenv("TEMPERATURE", "0.1")),
-            max_tokens=int(os.getenv("MAX_TOKENS", "2000")),
-            ldraw_path=os.getenv("LDRAW_PATH"),
-            leocad_timeout=int(os.getenv("LEOCAD_TIMEOUT", "60")),
-            generate_pdf=os.getenv("GENERATE_PDF", "true").lower() == "true",
-            pdf_page_size=os.getenv("PDF_PAGE_SIZE", "A4"),
-            pdf_image_width=float(os.getenv("PDF_IMAGE_WIDTH", "7.5")),
-            pdf_image_height=float(os.getenv("PDF_IMAGE_HEIGHT", "5.625")),
-        )
+        """Load configuration from environment variables (parsed once per process)."""
+        return _config_from_env()
+    
+    @cached_property
+    def instructions_dir(self) -> Path:
+        """Directory that instruction images, BOMs and PDFs are written to."""
+        return self.output_dir / "instructions"
     
     def ensure_output_dir(self) -> None:
         """Ensure the output directory exists."""
         self.output_dir.mkdir(parents=True, exist_ok=True)
+
+
+@lru_cache(maxsize=1)
+def _config_from_env() -> Config:
+    """Read .env and the environment into a Config, memoized for the process."""
+    load_dotenv()
+    
+    return Config(
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        anthropic_api_key=os.getenv("ANTHROPIC_API_KEY"),
+        google_api_key=os.getenv("GOOGLE_API_KEY"),
+        output_dir=Path(os.getenv("OUTPUT_DIR", "omr_output")).resolve(),
+        cache_dir=Path(os.getenv("CACHE_DIR", "~/.brickkit/cache")).expanduser(),
+        omr_cache_ttl=int(os.getenv("OMR_CACHE_TTL", "86400")),
+        omr_base_url=os.getenv("OMR_BASE_URL", "https://library.ldraw.org/omr"),
+        omr_search_url=os.getenv("OMR_SEARCH_URL", "https://library.ldraw.org/omr/sets"),
+        debug=os.getenv("BRICKKIT_DEBUG", "false").lower() == "true",
+        default_model=os.getenv("DEFAULT_MODEL", "anthropic:claude-sonnet-4-5"),
+        temperature=float(os.getenv("TEMPERATURE", "0.1")),
+        max_tokens=int(os.getenv("MAX_TOKENS", "2000")),
+        ldraw_path=os.getenv("LDRAW_PATH"),
+        leocad_timeout=int(os.getenv("LEOCAD_TIMEOUT", "60")),
+        generate_pdf=os.getenv("GENERATE_PDF", "true").lower() == "true",
+        pdf_page_size=os.getenv("PDF_PAGE_SIZE", "A4"),
+        pdf_image_width=float(os.getenv("PDF_IMAGE_WIDTH", "7.5")),
+        pdf_image_height=float(os.getenv("PDF_IMAGE_HEIGHT", "5.625")),
+    )
@@ -0,0 +1,5 @@
+"""Diagnostic helpers for inspecting the OMR site."""
+
+from .omr_probe import probe
+
+__all__ = ["probe"]
@@ -0,0 +1,187 @@
+"""Probe the OMR search page to see what the scraper is working with."""
+
+import asyncio
+from typing import Literal
+
+from ..browser_pool import close_browser, get_browser
+
+SEARCH_URL = "https://library.ldraw.org/omr/sets?search=car"
+
+# Candidate selectors for OMR result rows, most specific first
+_RESULT_SELECTORS = (
+    'table tbody tr',
+    '.table tbody tr',
+    '[data-testid="result"]',
+    '.result-item',
+    '.set-item',
+    'tr',
+    '.row',
+)
+
+_TABLE_INFO_JS = """
+    () => {
+        // Resolve table, tbody and rows in a single selector pass;
+        // only fall back to narrower lookups to explain an empty result
+        const rows = document.querySelectorAll('table tbody tr');
+        if (rows.length === 0) {
+            if (!document.querySelector('table')) {
+                return { error: 'No table found' };
+            }
+            if (!document.querySelector('table tbody')) {
+                return { error: 'No tbody found' };
+            }
+        }
+        
+        console.log('Found', rows.length, 'rows in tbody');
+        
+        const results = [];
+        for (let i = 0; i < Math.min(rows.length, 5); i++) {
+            const row = rows[i];
+            const cells = row.querySelectorAll('td');
+            
+            const rowData = {
+                rowIndex: i,
+                cellCount: cells.length,
+                cells: []
+            };
+            
+            // innerHTML serializes the whole subtree, so only pay for it
+            // on long cells; link detection uses the live tag collection
+            for (let j = 0, cellCount = cells.length; j < cellCount; j++) {
+                const cell = cells[j];
+                const text = cell.textContent?.trim() || '';
+                rowData.cells.push({
+                    index: j,
+                    text: text,
+                    html: text.length > 50 ? cell.innerHTML : null,
+                    hasLink: cell.getElementsByTagName('a').length > 0
+                });
+            }
+            
+            results.push(rowData);
+        }
+        
+        return {
+            totalRows: rows.length,
+            sampleRows: results
+        };
+    }
+"""
+
+
+async def probe(mode: Literal['summary', 'detail'] = 'summary', browser=None):
+    """Load the OMR search page and print either a selector summary or a table dump."""
+    if browser is None:
+        browser = await get_browser()
+    
+    context = await browser.new_context()
+    page = await context.new_page()
+    
+    try:
+        print(f"Navigating to: {SEARCH_URL}")
+        await page.goto(SEARCH_URL, wait_until='networkidle')
+        
+        print("Page loaded, waiting for content...")
+        try:
+            # Proceed as soon as the Livewire-rendered rows exist
+            await page.wait_for_selector('table tbody tr, [data-testid="result"]', state='attached', timeout=5000)
+        except Exception:
+            print("No result rows appeared within 5s, continuing with diagnostics")
+        
+        if mode == 'detail':
+            await _print_table_detail(page)
+        else:
+            await _print_summary(page)
+    
+    except Exception as e:
+        print(f"Error: {e}")
+    finally:
+        await context.close()
+
+
+async def _print_summary(page):
+    """Screenshot the page and report which result selectors match."""
+    # Take a screenshot to see what we're getting
+    await page.screenshot(path="omr_debug.png")
+    print("Screenshot saved as omr_debug.png")
+    
+    # Check what elements are on the page
+    print("\n=== Page Content Analysis ===")
+    
+    # Check for tables
+    tables = await page.query_selector_all('table')
+    print(f"Found {len(tables)} tables")
+    
+    # Check for any elements with "car" in them
+    car_elements = await page.query_selector_all('*:has-text("car")')
+    print(f"Found {len(car_elements)} elements containing 'car'")
+    
+    # Check for any result-like elements
+    # Count in the page in one round trip, without fetching element handles
+    selector_counts, total = await page.evaluate(
+        """(selectors) => [
+            Object.fromEntries(selectors.map(sel => [sel, document.querySelectorAll(sel).length])),
+            document.querySelectorAll(selectors.join(", ")).length
+        ]""",
+        list(_RESULT_SELECTORS)
+    )
+    print(f"Found {total} elements matching any result selector")
+    
+    for selector in _RESULT_SELECTORS:
+        count = selector_counts.get(selector, 0)
+        if count:
+            print(f"Found {count} elements with selector: {selector}")
+            if count <= 5:  # Show first few
+                # Pull the sample texts in one round trip rather than one per element
+                texts = await page.locator(selector).evaluate_all(
+                    "els => els.slice(0, 3).map(e => (e.textContent || '').slice(0, 100))"
+                )
+                for i, text in enumerate(texts):
+                    print(f"  Element {i+1}: {text}...")
+    
+    # Get page HTML to analyze
+    html = await page.content()
+    print(f"\nPage HTML length: {len(html)} characters")
+    
+    # Look for specific patterns
+    if "No results" in html or "no results" in html:
+        print("❌ Page contains 'No results' message")
+    elif "car" in html.lower():
+        print("✅ Page contains 'car' text")
+    else:
+        print("❓ Page doesn't contain 'car' text")
+    
+    # Check if it's a JavaScript app
+    if "livewire" in html.lower() or "alpine" in html.lower():
+        print("✅ Detected JavaScript framework (Livewire/Alpine)")
+
+
+async def _print_table_detail(page):
+    """Dump the cells of the first few result rows."""
+    table_info = await page.evaluate(_TABLE_INFO_JS)
+    
+    print("\n=== Table Analysis ===")
+    if 'error' in table_info:
+        print(f"❌ {table_info['error']}")
+    else:
+        print(f"✅ Found {table_info['totalRows']} rows in table")
+        print(f"Sample of first {len(table_info['sampleRows'])} rows:")
+        
+        for row in table_info['sampleRows']:
+            print(f"\nRow {row['rowIndex']} ({row['cellCount']} cells):")
+            for cell in row['cells']:
+                print(f"  Cell {cell['index']}: '{cell['text']}' (has link: {cell['hasLink']})")
+                if cell['text'] and len(cell['text']) > 50:
+                    print(f"    Full text: {cell['text'][:100]}...")
+
+
+async def main(mode: Literal['summary', 'detail'] = 'summary'):
+    """Run one probe and shut the shared browser down afterwards."""
+    try:
+        await probe(mode)
+    finally:
+        await close_browser()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
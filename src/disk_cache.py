@@ -0,0 +1,74 @@
+"""File-based cache used to skip repeated OMR scrapes and LLM calls."""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from pydantic import TypeAdapter
+
+
+def cache_key(*parts: Any) -> str:
+    """Build a stable hex key from the given parts."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """A directory of cached entries with an optional mtime-based TTL.
+
+    Entries are pickled unless a pydantic TypeAdapter is given, in which case
+    they are stored as JSON encoded and decoded by pydantic-core.
+    """
+
+    def __init__(self, directory: Path, ttl_seconds: Optional[float] = None, adapter: Optional[TypeAdapter] = None):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.adapter = adapter
+
+    def _path(self, key: str) -> Path:
+        suffix = ".json" if self.adapter is not None else ".pkl"
+        return self.directory / f"{key}{suffix}"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if it is missing or expired."""
+        path = self._path(key)
+        try:
+            if self.ttl_seconds is not None and time.time() - path.stat().st_mtime > self.ttl_seconds:
+                return None
+            with open(path, "rb") as f:
+                if self.adapter is not None:
+                    return self.adapter.validate_json(f.read())
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️  Ignoring unreadable cache entry {path.name}: {e}")
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value, replacing any previous entry atomically."""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            # A unique temp file per write, so concurrent writers of one key never share it
+            with tempfile.NamedTemporaryFile(dir=self.directory, prefix=f"{path.name}.", suffix=".tmp", delete=False) as f:
+                tmp_path = f.name
+                try:
+                    if self.adapter is not None:
+                        f.write(self.adapter.dump_json(value))
+                    else:
+                        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                except BaseException:
+                    f.close()
+                    os.unlink(tmp_path)
+                    raise
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"⚠️  Failed to write cache entry: {e}")
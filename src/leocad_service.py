@@ -1,185 +1,323 @@
 """LeoCAD integration service for generating LEGO model instructions."""
 
 import asyncio
+import ctypes
+import ctypes.util
 import os
+import re
 import shutil
-import subprocess
+import struct
 import sys
 import time
+import traceback
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 from .config import Config
 from .models import InstructionGenerationResult
 from .pdf_instruction_service import PDFInstructionService
 
+# Characters removed from frontend filenames outright
+_FILENAME_DROP_TABLE = str.maketrans('', '', '{}()[]<>:"/\\|?*\'!.')
+_SEPARATOR_RUN_RE = re.compile(r'[\s,;_]+')
+
+
+# Last LDraw lookup as (monotonic time, path); a hit is kept for the process,
+# a miss is retried after LDRAW_MISS_TTL seconds in case the library gets installed
+_ldraw_lookup: Optional[Tuple[float, Optional[str]]] = None
+LDRAW_MISS_TTL = 60.0
+
+
+def _find_ldraw_path() -> Optional[str]:
+    """Find the LDraw library path on the system, caching the result."""
+    global _ldraw_lookup
+    now = time.monotonic()
+    if _ldraw_lookup is not None:
+        checked_at, path = _ldraw_lookup
+        if path is not None or now - checked_at < LDRAW_MISS_TTL:
+            return path
+    
+    path = _scan_ldraw_path()
+    _ldraw_lookup = (now, path)
+    return path
+
+
+def _scan_ldraw_path() -> Optional[str]:
+    """Probe the common LDraw install locations and LDRAW_PATH."""
+    # Common LDraw installation paths on macOS
+    possible_paths = [
+        "/Applications/LDraw",
+        "/usr/local/share/LDraw",
+        "/opt/homebrew/share/LDraw",
+        "/usr/share/LDraw",
+        os.path.expanduser("~/LDraw"),
+        os.path.expanduser("~/Library/Application Support/LDraw"),
+        "/Users/pranavlingareddy/Desktop/ldraw",  # User's specific path
+    ]
+    
+    for path in possible_paths:
+        if os.path.exists(os.path.join(path, "parts")):
+            return path
+            
+    # Try to find via environment variable
+    ldraw_env = os.getenv("LDRAW_PATH")
+    if ldraw_env and os.path.exists(ldraw_env):
+        return ldraw_env
+        
+    return None
+
+
+def _probe_leocad_executable() -> Optional[str]:
+    """Return the first executable LeoCAD on PATH or in a known install location, or None."""
+    # A PATH walk and access checks are enough; spawning `leocad --version`
+    # costs a fork/exec per candidate and a broken install still fails the export
+    on_path = shutil.which("leocad")
+    if on_path:
+        return on_path
+    for leocad_path in (
+        "/Applications/LeoCAD.app/Contents/MacOS/LeoCAD",  # macOS app bundle
+        "/usr/local/bin/leocad",  # Homebrew
+        "/opt/homebrew/bin/leocad",  # Apple Silicon Homebrew
+    ):
+        if os.access(leocad_path, os.X_OK):
+            return leocad_path
+    
+    return None
+
+
+# Most steps LeoCAD is asked to render (its -t option)
+LEOCAD_MAX_STEPS = 15
+# Idle time allowed after the last expected step image before LeoCAD is stopped
+FINAL_STEP_GRACE_SECONDS = 10.0
+# Step number in a "Saved '.../step15.png'" completion line
+_SAVED_STEP_RE = re.compile(r"(\d+)\.png'")
+
+
+def _sweep_dir(directory: Path, should_remove: Callable[[os.DirEntry], bool]) -> int:
+    """Unlink matching files in one scandir pass, skipping entries that cannot be checked or removed."""
+    removed = 0
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if should_remove(entry):
+                        os.unlink(entry.path)
+                        removed += 1
+                except OSError as e:
+                    print(f"   ⚠️  Could not remove file: {e}")
+    except FileNotFoundError:
+        return 0
+    return removed
+
+
+# inotify(7) constants, used to watch LeoCAD write step images on Linux
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = os.O_CLOEXEC
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+
+@lru_cache(maxsize=1)
+def _libc():
+    """Load libc for the inotify calls, or None where it is not available."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    except OSError:
+        return None
+    return libc if hasattr(libc, "inotify_init1") else None
+
+
+def _open_step_watch(directory: str) -> Optional[int]:
+    """Open a non-blocking inotify fd reporting files finished (written or renamed in) in directory."""
+    libc = _libc()
+    if libc is None:
+        return None
+    
+    fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(directory), _IN_CLOSE_WRITE | _IN_MOVED_TO) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _inotify_event_names(data: bytes) -> List[str]:
+    """Decode the file names from a buffer of inotify events."""
+    names = []
+    offset = 0
+    while offset + _INOTIFY_EVENT.size <= len(data):
+        _, _, _, name_len = _INOTIFY_EVENT.unpack_from(data, offset)
+        offset += _INOTIFY_EVENT.size
+        name = data[offset:offset + name_len].rstrip(b"\0")
+        offset += name_len
+        if name:
+            names.append(os.fsdecode(name))
+    return names
+
+
+# MPDs above this size are counted chunk by chunk instead of read whole
+_MARKER_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def _count_markers(path: str, markers: Tuple[bytes, ...]) -> Tuple[int, ...]:
+    """Count non-overlapping occurrences of each marker in a file with bounded memory."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size <= _MARKER_CHUNK_SIZE:
+            content = f.read()
+            return tuple(content.count(marker) for marker in markers)
+        
+        counts = [0] * len(markers)
+        # Keep the last len(marker) - 1 bytes per marker so matches across chunk edges are counted once
+        tails = [b''] * len(markers)
+        while chunk := f.read(_MARKER_CHUNK_SIZE):
+            for i, marker in enumerate(markers):
+                window = tails[i] + chunk
+                counts[i] += window.count(marker)
+                tails[i] = window[-(len(marker) - 1):] if len(marker) > 1 else b''
+        return tuple(counts)
+
+
+def _file_size(path) -> int:
+    """Size of a file from a single stat, or 0 if it does not exist."""
+    try:
+        return os.stat(path).st_size
+    except FileNotFoundError:
+        return 0
+
+
+def _fast_copy(src: Path, dst: Path, size: int):
+    """Copy file contents in the kernel where possible, without copying metadata."""
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+        copied = 0
+        
+        if hasattr(os, "copy_file_range"):
+            try:
+                while copied < size:
+                    sent = os.copy_file_range(src_fd, dst_fd, size - copied)
+                    if sent == 0:
+                        break
+                    copied += sent
+            except OSError:
+                pass
+        
+        if copied < size and hasattr(os, "sendfile"):
+            try:
+                while copied < size:
+                    sent = os.sendfile(dst_fd, src_fd, copied, size - copied)
+                    if sent == 0:
+                        break
+                    copied += sent
+            except OSError:
+                pass
+        
+        if copied < size:
+            # Resume from wherever the kernel paths stopped
+            fsrc.seek(copied)
+            fdst.seek(copied)
+            shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+
 
 class LeoCADService:
     """Service for generating instructions using LeoCAD CLI."""
     
+    # Working LeoCAD executable per (platform, PATH), probed once per process
+    _leocad_probe_cache: Dict[Tuple[str, Optional[str]], Optional[str]] = {}
+    
+    # Demo models shipped with the frontend, never removed by cleanup
+    _protected_stems = frozenset({"red_race_car", "geometric_test", "simple_test", "single_part_test", "ultra_simple"})
+    
     def __init__(self, config: Config):
         self.config = config
         self.ldraw_path = config.ldraw_path or self._find_ldraw_path()
         self._leocad_executable = None
         self.pdf_service = PDFInstructionService(config)
+        self._frontend_models_dir = (Path(__file__).parent.parent.parent / "brick-linkfrontend" / "public" / "ldraw" / "models").resolve()
         
     def _find_ldraw_path(self) -> Optional[str]:
         """Find the LDraw library path on the system."""
-        # Common LDraw installation paths on macOS
-        possible_paths = [
-            "/Applications/LDraw",
-            "/usr/local/share/LDraw",
-            "/opt/homebrew/share/LDraw",
-            "/usr/share/LDraw",
-            os.path.expanduser("~/LDraw"),
-            os.path.expanduser("~/Library/Application Support/LDraw"),
-            "/Users/pranavlingareddy/Desktop/ldraw",  # User's specific path
-        ]
-        
-        for path in possible_paths:
-            if os.path.exists(path) and os.path.exists(os.path.join(path, "parts")):
-                return path
-                
-        # Try to find via environment variable
-        ldraw_env = os.getenv("LDRAW_PATH")
-        if ldraw_env and os.path.exists(ldraw_env):
-            return ldraw_env
-            
-        return None
+        return _find_ldraw_path()
     
     def _check_leocad_available(self) -> bool:
         """Check if LeoCAD CLI is available."""
-        # Try different LeoCAD executable paths
-        leocad_paths = [
-            "leocad",  # If in PATH
-            "/Applications/LeoCAD.app/Contents/MacOS/LeoCAD",  # macOS app bundle
-            "/usr/local/bin/leocad",  # Homebrew
-            "/opt/homebrew/bin/leocad",  # Apple Silicon Homebrew
-        ]
-        
-        for leocad_path in leocad_paths:
-            try:
-                result = subprocess.run(
-                    [leocad_path, "--version"], 
-                    capture_output=True, 
-                    text=True, 
-                    timeout=10
-                )
-                if result.returncode == 0:
-                    # Store the working path for later use
-                    self._leocad_executable = leocad_path
-                    return True
-            except (subprocess.TimeoutExpired, FileNotFoundError):
-                continue
-        
-        return False
+        key = (sys.platform, os.environ.get("PATH"))
+        if key not in self._leocad_probe_cache:
+            self._leocad_probe_cache[key] = _probe_leocad_executable()
+        
+        # Store the working path for later use
+        self._leocad_executable = self._leocad_probe_cache[key]
+        return self._leocad_executable is not None
     
     def _check_mpd_has_steps(self, mpd_path: str) -> Tuple[bool, int]:
         """Check if MPD file has step markers and count them."""
         try:
-            with open(mpd_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                step_markers = content.count('0 STEP')
-                # Also count part placements (lines starting with "1 ")
-                part_placements = content.count('\n1 ')
-                print(f"   MPD analysis: {step_markers} step markers, {part_placements} part placements")
-                return step_markers > 0, step_markers
+            # Count on the raw bytes: the markers are ASCII, so there's no need to decode.
+            # Also count part placements (lines starting with "1 ")
+            step_markers, part_placements = _count_markers(mpd_path, (b'0 STEP', b'\n1 '))
+            print(f"   MPD analysis: {step_markers} step markers, {part_placements} part placements")
+            return step_markers > 0, step_markers
         except Exception as e:
             print(f"Error reading MPD file: {e}")
             return False, 0
     
+    async def cleanup_old_outputs(self, current_mpd_path: str = None):
+        """Clean up old output files in a worker thread so the event loop stays free."""
+        await asyncio.to_thread(self._cleanup_old_outputs, current_mpd_path)
+    
     def _cleanup_old_outputs(self, current_mpd_path: str = None):
         """Clean up old output files to prevent interference between builds."""
         try:
             print(f"🧹 Cleaning up old output files...")
             
-            # Clean up instructions directory
-            instructions_dir = self.config.output_dir / "instructions"
-            if instructions_dir.exists():
-                # Remove all PDF files
-                for pdf_file in instructions_dir.glob("*.pdf"):
-                    pdf_file.unlink()
-                    print(f"   🗑️  Removed old PDF: {pdf_file.name}")
-                
-                # Remove BOM CSV
-                bom_file = instructions_dir / "bom.csv"
-                if bom_file.exists():
-                    bom_file.unlink()
-                    print(f"   🗑️  Removed old BOM: {bom_file.name}")
-                
-                # Clean up steps directory
-                steps_dir = instructions_dir / "steps"
-                if steps_dir.exists():
-                    for step_file in steps_dir.glob("*.png"):
-                        step_file.unlink()
-                    print(f"   🗑️  Removed old step images")
+            removed = {}
+            
+            # Clean up instructions directory: PDFs, the BOM CSV and step images
+            instructions_dir = self.config.instructions_dir
+            removed["PDF/BOM"] = _sweep_dir(
+                instructions_dir,
+                lambda entry: entry.name.endswith(".pdf") or entry.name == "bom.csv"
+            )
+            removed["step image"] = _sweep_dir(instructions_dir / "steps", lambda entry: entry.name.endswith(".png"))
             
             # Clean up ALL old MPD files (remove all previous models)
             # But don't remove the current model file if it's being processed
-            mpd_files = list(self.config.output_dir.glob("*.mpd"))
-            if current_mpd_path:
-                current_mpd_path_obj = Path(current_mpd_path)
-                for mpd_file in mpd_files:
-                    # Don't remove the current model file if it's the one being processed
-                    if mpd_file.resolve() != current_mpd_path_obj.resolve():
-                        mpd_file.unlink()
-                        print(f"   🗑️  Removed old MPD: {mpd_file.name}")
-                    else:
-                        print(f"   ⏭️  Keeping current MPD: {mpd_file.name}")
-            else:
-                # If no current MPD path provided, remove all MPD files
-                for mpd_file in mpd_files:
-                    mpd_file.unlink()
-                    print(f"   🗑️  Removed old MPD: {mpd_file.name}")
+            current_mpd = os.path.realpath(current_mpd_path) if current_mpd_path else None
+            removed["MPD"] = _sweep_dir(
+                self.config.output_dir,
+                lambda entry: entry.name.endswith(".mpd") and os.path.realpath(entry.path) != current_mpd
+            )
             
             # Also clean up frontend model files
-            frontend_models_dir = Path(__file__).parent.parent.parent / "brick-linkfrontend" / "public" / "ldraw" / "models"
-            frontend_models_dir = frontend_models_dir.resolve()  # Use absolute path
-            if frontend_models_dir.exists():
-                for frontend_mpd in frontend_models_dir.glob("*.mpd"):
-                    # Keep the original demo files and recently generated files
-                    protected_names = ("red_race_car", "geometric_test", "simple_test", "single_part_test", "ultra_simple")
-                    if not frontend_mpd.name.startswith(protected_names):
-                        # Check if this is a recently generated file (less than 1 hour old)
-                        file_age_hours = (time.time() - frontend_mpd.stat().st_mtime) / 3600
-                        if file_age_hours > 1:  # Only delete files older than 1 hour
-                            try:
-                                frontend_mpd.unlink()
-                                print(f"   🗑️  Removed old frontend MPD: {frontend_mpd.name}")
-                            except Exception as e:
-                                print(f"   ⚠️  Could not remove {frontend_mpd.name}: {e}")
-                        else:
-                            print(f"   ⏭️  Keeping recent frontend MPD: {frontend_mpd.name}")
+            # Keep the original demo files and recently generated files (less than 1 hour old)
+            cutoff = time.time() - 3600
+            removed["frontend MPD"] = _sweep_dir(
+                self._frontend_models_dir,
+                lambda entry: (
+                    entry.name.endswith(".mpd")
+                    and entry.name[:-4] not in self._protected_stems
+                    and entry.stat().st_mtime < cutoff
+                )
+            )
             
+            summary = ", ".join(f"{count} {kind}(s)" for kind, count in removed.items() if count)
+            print(f"   🗑️  Removed {summary or 'nothing'}")
             print(f"   ✅ Cleanup completed")
             
         except Exception as e:
             print(f"   ⚠️  Cleanup warning: {e}")
 
-    def _clean_filename(self, filename: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _clean_filename(filename: str) -> str:
         """Clean filename to be safe for file systems and URLs."""
-        import re
-        
-        # Remove or replace problematic characters
-        clean = filename
-        
-        # Remove special characters that cause issues
-        clean = re.sub(r'[{}()\[\]<>:"/\\|?*]', '', clean)
-        
-        # Replace spaces and common separators with single underscores
-        clean = re.sub(r'[\s,;]+', '_', clean)
-        
-        # Remove apostrophes and quotes
-        clean = clean.replace("'", "").replace('"', '')
-        
-        # Remove exclamation marks and other punctuation
-        clean = clean.replace("!", "").replace("?", "").replace(".", "")
-        
-        # Remove multiple consecutive underscores
-        clean = re.sub(r'_+', '_', clean)
-        
-        # Remove leading/trailing underscores
-        clean = clean.strip('_')
+        # Drop problematic characters and punctuation, then turn every run of
+        # spaces, separators and underscores into a single underscore
+        clean = _SEPARATOR_RUN_RE.sub('_', filename.translate(_FILENAME_DROP_TABLE)).strip('_')
         
         # Ensure it's not empty and not too long
         if not clean:
@@ -195,7 +333,7 @@ class LeoCADService:
         
         # Don't cleanup during instruction generation - only on refresh button
         
-        result = InstructionGenerationResult(
+        result = InstructionGenerationResult.model_construct(
             success=False,
             error_message=None,
             step_images=[],
@@ -242,7 +380,7 @@ class LeoCADService:
         
         # Create instructions directory
         print(f"📁 Creating output directories...")
-        instructions_dir = self.config.output_dir / "instructions"
+        instructions_dir = self.config.instructions_dir
         steps_dir = instructions_dir / "steps"
         steps_dir.mkdir(parents=True, exist_ok=True)
         print(f"   Instructions dir: {instructions_dir}")
@@ -250,7 +388,7 @@ class LeoCADService:
         
         # Export step images
         print(f"\n🎨 === STEP IMAGE GENERATION ===")
-        step_result = await self._export_step_images(mpd_path, str(steps_dir), step_count)
+        step_result = await self._export_step_images(mpd_path, str(steps_dir), step_count, bom_path=instructions_dir / "bom.csv")
         if step_result["success"]:
             result.step_images = step_result["step_images"]
             print(f"✅ Generated {len(result.step_images)} step images")
@@ -261,9 +399,14 @@ class LeoCADService:
         
         # Export BOM
         print(f"\n📋 === BOM GENERATION ===")
-        bom_result = await self._export_bom(mpd_path)
-        if bom_result["success"]:
-            result.bom_csv = bom_result["bom_csv"]
+        if step_result["bom_csv"]:
+            result.bom_csv = step_result["bom_csv"]
+            print(f"   ✅ BOM CSV created with the step images: {result.bom_csv}")
+        else:
+            # Fall back to a separate run if the combined export did not write it
+            bom_result = await self._export_bom(mpd_path)
+            if bom_result["success"]:
+                result.bom_csv = bom_result["bom_csv"]
         
         # Generate PDF instructions
         if self.config.generate_pdf:
@@ -290,12 +433,7 @@ class LeoCADService:
         
         # Copy model to frontend public directory for immediate display
         if mpd_path:
-            print(f"🔄 About to copy model to frontend: {mpd_path}")
-            copy_result = self._copy_model_to_frontend(mpd_path)
-            if copy_result:
-                print(f"✅ Model copy successful: {copy_result}")
-            else:
-                print(f"❌ Model copy failed")
+            self._copy_model_to_frontend(mpd_path)
         
         print(f"\n🎉 === INSTRUCTION GENERATION COMPLETE ===")
         result.success = True
@@ -303,91 +441,119 @@ class LeoCADService:
     
     def _copy_model_to_frontend(self, mpd_path: str):
         """Copy the generated MPD file to the frontend's public directory for immediate display."""
-        print(f"🔄 Starting model copy to frontend: {mpd_path}")
-        print(f"   Source file exists: {os.path.exists(mpd_path)}")
-        print(f"   Current working directory: {os.getcwd()}")
-        print(f"   __file__ location: {__file__}")
-        
-        # Add a simple test to verify this function is being called
-        print(f"   🧪 FUNCTION CALLED - This should appear in logs")
-        
         try:
             # Define frontend public directory path
-            frontend_public_dir = Path(__file__).parent.parent.parent / "brick-linkfrontend" / "public" / "ldraw" / "models"
-            
-            print(f"   Calculated frontend dir: {frontend_public_dir}")
-            print(f"   Frontend dir absolute: {frontend_public_dir.absolute()}")
-            print(f"   Frontend dir exists: {frontend_public_dir.exists()}")
+            frontend_public_dir = self._frontend_models_dir
             
             # Ensure the directory exists
             frontend_public_dir.mkdir(parents=True, exist_ok=True)
-            print(f"   Directory created/verified: {frontend_public_dir.exists()}")
             
             # Create a clean filename for the frontend
             source_file = Path(mpd_path)
-            print(f"   Source file absolute: {source_file.absolute()}")
-            print(f"   Source file exists: {source_file.exists()}")
+            source_stat = os.stat(source_file)
             
             clean_name = self._clean_filename(source_file.stem)
             frontend_filename = f"{clean_name}.mpd"
             frontend_path = frontend_public_dir / frontend_filename
             
-            print(f"   Clean name: {clean_name}")
-            print(f"   Target path: {frontend_path}")
-            print(f"   Target absolute: {frontend_path.absolute()}")
-            
-            # Check if target already exists
-            if frontend_path.exists():
-                print(f"   ⚠️  Target file already exists, removing...")
-                frontend_path.unlink()
-            
-            # Copy the file
-            print(f"   📋 Executing copy operation...")
-            print(f"   Source: {source_file}")
-            print(f"   Target: {frontend_path}")
+            if self.config.debug:
+                print(f"🔄 Copying model to frontend: {source_file} ({source_stat.st_size} bytes) -> {frontend_path}")
             
+            # Copy next to the target and swap it in, so an existing file is
+            # replaced atomically without a separate exists/unlink step
+            temp_path = frontend_path.with_name(f".{frontend_filename}.tmp")
             try:
-                shutil.copy2(source_file, frontend_path)
-                print(f"   ✅ shutil.copy2 completed without exception")
-            except Exception as copy_error:
-                print(f"   ❌ shutil.copy2 failed: {copy_error}")
-                raise copy_error
-            
-            # Verify the copy
-            print(f"   ✅ Copy operation completed")
-            print(f"   Target exists after copy: {frontend_path.exists()}")
-            if frontend_path.exists():
-                print(f"   Target file size: {frontend_path.stat().st_size} bytes")
-                print(f"   Source file size: {source_file.stat().st_size} bytes")
-            else:
-                print(f"   ❌ CRITICAL: Target file does not exist after copy!")
+                _fast_copy(source_file, temp_path, source_stat.st_size)
+                os.replace(temp_path, frontend_path)
+            except Exception:
+                temp_path.unlink(missing_ok=True)
+                raise
             
-            print(f"📁 Copied model to frontend: {frontend_path}")
-            print(f"   Frontend URL: /ldraw/models/{frontend_filename}")
+            target_size = os.stat(frontend_path).st_size
+            if target_size != source_stat.st_size:
+                print(f"   ⚠️  Size mismatch after copy: {target_size} != {source_stat.st_size} bytes")
+            
+            print(f"📁 Copied model to frontend: {frontend_path} (URL: /ldraw/models/{frontend_filename})")
             
             return str(frontend_path)
             
         except Exception as e:
             print(f"⚠️  Failed to copy model to frontend: {e}")
-            print(f"   Exception type: {type(e).__name__}")
-            import traceback
-            print(f"   Traceback: {traceback.format_exc()}")
+            if self.config.debug:
+                traceback.print_exc()
             return None
     
-    async def _monitor_step_generation(self, output_dir: str, expected_steps: int):
-        """Monitor step image generation progress."""
+    async def _monitor_step_generation(
+        self, output_dir: str, expected_steps: int, step_files: Dict[str, int], inotify_fd: Optional[int]
+    ):
+        """Monitor step image generation progress, recording each finished image and its size in step_files."""
+        # The monitor owns the watch opened by the caller; without one (non-Linux), poll instead
+        if inotify_fd is None:
+            await self._poll_step_generation(output_dir, expected_steps, step_files)
+            return
+        
+        loop = asyncio.get_running_loop()
+        readable = asyncio.Event()
+        loop.add_reader(inotify_fd, readable.set)
+        start_time = loop.time()
+        
+        def record_events():
+            try:
+                data = os.read(inotify_fd, 64 * 1024)
+            except BlockingIOError:
+                return
+            for name in _inotify_event_names(data):
+                if not (name.startswith('step') and name.endswith('.png')):
+                    continue
+                path = os.path.join(output_dir, name)
+                try:
+                    size = os.stat(path).st_size
+                except FileNotFoundError:
+                    continue
+                if path not in step_files:
+                    elapsed = loop.time() - start_time
+                    print(f"   📸 Generated step {len(step_files) + 1}: {name} (elapsed: {elapsed:.1f}s)")
+                step_files[path] = size
+        
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(readable.wait(), timeout=10)
+                except asyncio.TimeoutError:
+                    if step_files:
+                        elapsed = loop.time() - start_time
+                        print(f"   ⏳ Still processing... {len(step_files)} steps generated so far (elapsed: {elapsed:.1f}s)")
+                    continue
+                
+                readable.clear()
+                record_events()
+        except asyncio.CancelledError:
+            # Pick up images closed after the last wakeup
+            record_events()
+        finally:
+            loop.remove_reader(inotify_fd)
+            os.close(inotify_fd)
+    
+    async def _poll_step_generation(self, output_dir: str, expected_steps: int, step_files: Dict[str, int]):
+        """Monitor step image generation progress by polling the output directory."""
         last_count = 0
         start_time = asyncio.get_event_loop().time()
         
+        def scan():
+            with os.scandir(output_dir) as entries:
+                for entry in entries:
+                    if entry.name.startswith('step') and entry.name.endswith('.png'):
+                        step_files[entry.path] = entry.stat().st_size
+        
         while True:
             try:
                 # Count step images
-                step_files = [f for f in os.listdir(output_dir) if f.startswith('step') and f.endswith('.png')]
+                scan()
                 current_count = len(step_files)
                 
                 if current_count > last_count:
                     elapsed = asyncio.get_event_loop().time() - start_time
-                    print(f"   📸 Generated step {current_count}: {step_files[-1] if step_files else 'unknown'} (elapsed: {elapsed:.1f}s)")
+                    print(f"   📸 Generated step {current_count}: {os.path.basename(max(step_files))} (elapsed: {elapsed:.1f}s)")
                     last_count = current_count
                 elif current_count > 0:
                     # Show progress every 10 seconds even if no new steps
@@ -397,14 +563,19 @@ class LeoCADService:
                 
                 await asyncio.sleep(2)  # Check every 2 seconds
             except asyncio.CancelledError:
+                # Final pass so the caller sees every image written before exit
+                try:
+                    scan()
+                except OSError:
+                    pass
                 break
             except Exception:
                 # Ignore errors in monitoring
                 await asyncio.sleep(2)
     
-    async def _export_step_images(self, mpd_path: str, output_dir: str, step_count: int) -> dict:
-        """Export step images from LeoCAD."""
-        result = {"success": False, "error_message": None, "step_images": []}
+    async def _export_step_images(self, mpd_path: str, output_dir: str, step_count: int, bom_path: Optional[Path] = None) -> dict:
+        """Export step images from LeoCAD, optionally writing the BOM CSV in the same run."""
+        result = {"success": False, "error_message": None, "step_images": [], "bom_csv": None}
         
         try:
             print(f"🎨 Starting step image generation...")
@@ -424,46 +595,97 @@ class LeoCADService:
                 "-w", "1280",
                 "-h", "720", 
                 "-f", "1",
-                "-t", "15",  # Limit to 15 steps (step 10 is final, so 15 is safe)
+                "-t", str(LEOCAD_MAX_STEPS),  # Limit to 15 steps (step 10 is final, so 15 is safe)
                 "--fade-steps",
                 "--highlight",
                 "--viewpoint", "home"
             ]
+            if bom_path is not None:
+                # LeoCAD runs every requested export in one invocation, which
+                # saves starting it (and loading the parts library) twice
+                cmd += ["--export-csv", str(bom_path)]
             
             print(f"🚀 Running LeoCAD command...")
             print(f"   Command: {' '.join(cmd)}")
             
+            # Watch the output directory before LeoCAD starts, so images finished
+            # before the monitor task first runs are still reported
+            inotify_fd = _open_step_watch(output_dir)
+            
             # Run LeoCAD command with real-time output and timeout
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+            except BaseException:
+                if inotify_fd is not None:
+                    os.close(inotify_fd)
+                raise
             
             # Stream output in real-time
             print(f"⏳ LeoCAD is processing... (timeout: {self.config.leocad_timeout}s)")
             print(f"   Monitoring step generation progress...")
             
-            # Start monitoring step files for progress updates (lightweight)
-            step_monitor_task = asyncio.create_task(self._monitor_step_generation(output_dir, step_count))
+            # Start monitoring step files for progress updates (lightweight);
+            # the monitor also records each finished image with its size
+            step_files: Dict[str, int] = {}
+            step_monitor_task = asyncio.create_task(self._monitor_step_generation(output_dir, step_count, step_files, inotify_fd))
             
-            # Read output line by line
-            stdout_lines = []
+            # Read output line by line; stderr is kept for the error message
             stderr_lines = []
             
+            # Echo LeoCAD's chatter in batches instead of one write per line
+            loop = asyncio.get_running_loop()
+            output_buffer: List[str] = []
+            flush_handle = None
+            
+            def flush_output():
+                nonlocal flush_handle
+                if flush_handle is not None:
+                    flush_handle.cancel()
+                    flush_handle = None
+                if output_buffer:
+                    output_buffer.append("")
+                    sys.stdout.write("\n".join(output_buffer))
+                    sys.stdout.flush()
+                    output_buffer.clear()
+            
+            def buffer_output(text: str):
+                nonlocal flush_handle
+                output_buffer.append(text)
+                if len(output_buffer) >= 32:
+                    flush_output()
+                elif flush_handle is None:
+                    flush_handle = loop.call_later(0.5, flush_output)
+            
+            # Once LeoCAD saves the image for its -t limit there is nothing left
+            # to render, so it only gets a short idle grace period to exit on its
+            # own before it is stopped. The MPD's 0 STEP count is not used as the
+            # target: a final step without a trailing 0 STEP is one more image.
+            last_saved_at = loop.time()
+            final_step_saved = asyncio.Event()
+            stopped_early = False
+            
             async def read_stdout():
+                nonlocal last_saved_at
                 while True:
                     line = await process.stdout.readline()
                     if not line:
                         break
                     line_str = line.decode().strip()
-                    stdout_lines.append(line_str)
                     if line_str:  # Only print non-empty lines
                         if "Saved '" in line_str and ".png'" in line_str:
                             # This is a completion message from LeoCAD
+                            flush_output()
                             print(f"   ✅ {line_str}")
+                            last_saved_at = loop.time()
+                            saved_step = _SAVED_STEP_RE.search(line_str)
+                            if saved_step and int(saved_step.group(1)) >= LEOCAD_MAX_STEPS:
+                                final_step_saved.set()
                         else:
-                            print(f"   📝 {line_str}")
+                            buffer_output(f"   📝 {line_str}")
             
             async def read_stderr():
                 while True:
@@ -473,24 +695,36 @@ class LeoCADService:
                     line_str = line.decode().strip()
                     stderr_lines.append(line_str)
                     if line_str:  # Only print non-empty lines
-                        print(f"   ⚠️  {line_str}")
-            
+                        buffer_output(f"   ⚠️  {line_str}")
+            
+            async def stop_when_idle():
+                nonlocal stopped_early
+                await final_step_saved.wait()
+                while process.returncode is None:
+                    remaining = last_saved_at + FINAL_STEP_GRACE_SECONDS - loop.time()
+                    if remaining <= 0:
+                        print(f"   ⏹️  Final step saved, stopping idle LeoCAD process...")
+                        stopped_early = True
+                        process.terminate()
+                        return
+                    await asyncio.sleep(remaining)
+            
+            # Read both streams and wait for the process under one timeout
+            leocad_tasks = {
+                asyncio.create_task(read_stdout()),
+                asyncio.create_task(read_stderr()),
+                asyncio.create_task(process.wait()),
+            }
+            idle_stop_task = asyncio.create_task(stop_when_idle())
             try:
-                # Read both streams concurrently with timeout
-                await asyncio.wait_for(
-                    asyncio.gather(read_stdout(), read_stderr()),
-                    timeout=self.config.leocad_timeout
-                )
-                
-                # Cancel the monitoring task
-                step_monitor_task.cancel()
-                
-                # Wait for process to complete - this is crucial!
-                print(f"   ⏳ Waiting for LeoCAD to complete...")
-                return_code = await process.wait()
-                print(f"   ✅ LeoCAD process completed with exit code: {return_code}")
-                
-            except asyncio.TimeoutError:
+                done, pending = await asyncio.wait(leocad_tasks, timeout=self.config.leocad_timeout)
+            finally:
+                idle_stop_task.cancel()
+                flush_output()
+            
+            if pending:
+                for task in pending:
+                    task.cancel()
                 print(f"   ⏰ LeoCAD process timed out after {self.config.leocad_timeout}s")
                 print(f"   🔪 Terminating LeoCAD process...")
                 process.terminate()
@@ -505,32 +739,41 @@ class LeoCADService:
                 result["error_message"] = f"LeoCAD process timed out after {self.config.leocad_timeout} seconds"
                 return result
             
-            stdout = '\n'.join(stdout_lines)
+            # Surface reader errors the way gather used to
+            for task in done:
+                task.result()
+            print(f"   ✅ LeoCAD process completed with exit code: {process.returncode}")
+            
+            # Stop the monitor only now so it sees the last image written
+            step_monitor_task.cancel()
+            await asyncio.gather(step_monitor_task, return_exceptions=True)
+            
             stderr = '\n'.join(stderr_lines)
             
-            if process.returncode != 0:
-                error_msg = stderr.decode() if stderr else "Unknown error"
+            if process.returncode != 0 and not stopped_early:
+                error_msg = stderr or "Unknown error"
                 result["error_message"] = f"LeoCAD export failed: {error_msg}"
                 return result
             
-            # Check for generated images
-            step_images = []
-            for file in os.listdir(output_dir):
-                if file.startswith("step") and file.endswith(".png"):
-                    step_images.append(os.path.join(output_dir, file))
-            
-            if not step_images:
+            # Reconcile with one directory pass in case a watch event was missed
+            try:
+                with os.scandir(output_dir) as entries:
+                    for entry in entries:
+                        if entry.name.startswith('step') and entry.name.endswith('.png') and entry.path not in step_files:
+                            step_files[entry.path] = entry.stat().st_size
+            except OSError as e:
+                print(f"   ⚠️  Could not rescan step images: {e}")
+            
+            if not step_files:
                 result["error_message"] = "No instructions exported—this usually means the MPD has no steps."
                 return result
             
-            # Sort images by name to ensure correct order
-            step_images.sort()
-            
-            # Check for minimum file size (1KB)
-            valid_images = []
-            for img_path in step_images:
-                if os.path.getsize(img_path) > 1024:  # 1KB
-                    valid_images.append(img_path)
+            # Sort images by name to ensure correct order, and check for
+            # minimum file size (1KB); only small files are stat'ed again
+            valid_images = [
+                img_path for img_path in sorted(step_files)
+                if step_files[img_path] > 1024 or _file_size(img_path) > 1024
+            ]
             
             if not valid_images:
                 result["error_message"] = "All exported images are empty or corrupted."
@@ -539,6 +782,11 @@ class LeoCADService:
             result["success"] = True
             result["step_images"] = valid_images
             
+            # A stopped run may have cut the CSV short; the caller then
+            # falls back to a standalone BOM export
+            if bom_path is not None and not stopped_early and _file_size(bom_path) > 0:
+                result["bom_csv"] = str(bom_path)
+            
         except Exception as e:
             result["error_message"] = f"Error exporting step images: {str(e)}"
         
@@ -551,7 +799,7 @@ class LeoCADService:
         try:
             print(f"📋 Generating BOM CSV...")
             
-            instructions_dir = self.config.output_dir / "instructions"
+            instructions_dir = self.config.instructions_dir
             instructions_dir.mkdir(parents=True, exist_ok=True)
             
             bom_path = instructions_dir / "bom.csv"
@@ -578,7 +826,7 @@ class LeoCADService:
                 result["error_message"] = f"LeoCAD BOM export failed: {error_msg}"
                 return result
             
-            if os.path.exists(bom_path) and os.path.getsize(bom_path) > 0:
+            if _file_size(bom_path) > 0:
                 result["success"] = True
                 result["bom_csv"] = str(bom_path)
                 print(f"   ✅ BOM CSV created: {bom_path}")
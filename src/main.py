@@ -1,11 +1,14 @@
 """Main entry point for the Brick Kit FastAPI application."""
 
+import logging
+
 import uvicorn
 from .api.app import create_app_with_agent
 
 
 def main():
     """Run the FastAPI application."""
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     app = create_app_with_agent()
     
     print("🚀 Starting Brick Kit API server...")
@@ -1,41 +1,100 @@
 """Pydantic models for structured data in Brick Kit."""
 
-from datetime import datetime
-from pathlib import Path
-from typing import List, Optional
+import hashlib
+import sys
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, computed_field, field_validator
 
 
 class PromptAnalysis(BaseModel):
     """Analysis of user prompt for LEGO model search."""
     
+    # Built once per prompt and then only read, so it can be cached and shared as-is
+    model_config = ConfigDict(frozen=True)
+    
     theme: str = Field(..., description="Main theme (e.g., car, plane, house, spaceship)")
-    colors: List[str] = Field(default_factory=list, description="Colors mentioned in prompt")
-    constraints: List[str] = Field(default_factory=list, description="Size or complexity constraints")
-    keywords: List[str] = Field(default_factory=list, description="All relevant keywords for search")
-    related_concepts: List[str] = Field(default_factory=list, description="Related concepts from semantic analysis")
-    search_hints: List[str] = Field(default_factory=list, description="Search hints from semantic analysis")
+    colors: Tuple[str, ...] = Field((), description="Colors mentioned in prompt")
+    constraints: Tuple[str, ...] = Field((), description="Size or complexity constraints")
+    keywords: Tuple[str, ...] = Field((), description="All relevant keywords for search")
+    related_concepts: Tuple[str, ...] = Field((), description="Related concepts from semantic analysis")
+    search_hints: Tuple[str, ...] = Field((), description="Search hints from semantic analysis")
+    
+    @field_validator("colors", "constraints", "keywords", "related_concepts", "search_hints", mode="after")
+    @classmethod
+    def _intern_words(cls, words: Tuple[str, ...]) -> Tuple[str, ...]:
+        # The same short words recur across prompts; interning shares them and speeds lookups
+        return tuple(sys.intern(word) for word in words)
+    
+    @staticmethod
+    def cache_key(prompt: str) -> str:
+        """Stable key for caching the analysis of a prompt, ignoring case and spacing."""
+        # Prompts that differ only in spacing split into the same words, so they share an analysis
+        return hashlib.blake2b(" ".join(prompt.lower().split()).encode(), digest_size=16).hexdigest()
+    
+    @cached_property
+    def theme_lower(self) -> str:
+        """Lowercased theme, computed once rather than for every scored result."""
+        return self.theme.lower()
+    
+    @cached_property
+    def lowered(self) -> Dict[str, Tuple[str, ...]]:
+        """Lowercased word lists, computed once and reused when scoring every result."""
+        return {
+            field: tuple(word.lower() for word in getattr(self, field))
+            for field in ("colors", "constraints", "keywords", "related_concepts", "search_hints")
+        }
 
 
-class OMRSearchResult(BaseModel):
+@dataclass(frozen=True, slots=True, kw_only=True)
+class OMRSearchResult:
     """Result from OMR search."""
     
-    set_number: str = Field(..., description="LEGO set number")
-    name: str = Field(..., description="Set name")
-    theme: str = Field(..., description="Set theme")
-    year: Optional[int] = Field(None, description="Release year")
-    detail_url: str = Field(..., description="URL to set detail page")
-    relevance_score: float = Field(default=0.0, description="Relevance score (0-1)")
+    # A plain slotted dataclass: it only carries scraped fields, and pydantic still
+    # validates and serializes it through OMR_RESULTS_ADAPTER and the result models
+    set_number: str  # LEGO set number
+    name: str  # Set name
+    theme: str  # Set theme
+    year: Optional[int] = None  # Release year
+    detail_url: str  # URL to set detail page
+    relevance_score: float = 0.0  # Relevance score (0-1)
+    
+    def __post_init__(self):
+        # Themes come from a small vocabulary, so scraped results can share one string each
+        object.__setattr__(self, "theme", sys.intern(self.theme))
+    
+    @classmethod
+    def validate_many(cls, rows: List[dict]) -> List["OMRSearchResult"]:
+        """Validate a batch of scraped rows in one pass."""
+        return OMR_RESULTS_ADAPTER.validate_python(rows)
 
 
-class ModelVariant(BaseModel):
+@dataclass(frozen=True, slots=True, kw_only=True)
+class ModelVariant:
     """A variant of a LEGO model."""
     
-    name: str = Field(..., description="Variant name (e.g., 'Main Model', 'Small Version')")
-    download_url: str = Field(..., description="Direct download URL")
-    file_type: str = Field(..., description="File type (mpd, zip)")
-    relevance_score: float = Field(default=0.0, description="Relevance score for this variant")
+    name: str  # Variant name (e.g., 'Main Model', 'Small Version')
+    download_url: str  # Direct download URL
+    file_type: str  # File type (mpd, zip)
+    relevance_score: float = 0.0  # Relevance score for this variant
+    
+    def __post_init__(self):
+        object.__setattr__(self, "file_type", sys.intern(self.file_type))
+    
+    @classmethod
+    def validate_many(cls, rows: List[dict]) -> List["ModelVariant"]:
+        """Validate a batch of scraped variant rows in one pass."""
+        return MODEL_VARIANTS_ADAPTER.validate_python(rows)
+
+
+class ResultSelection(BaseModel):
+    """LLM choice of the best matching search result."""
+    
+    model_config = ConfigDict(frozen=True, extra="ignore")
+    
+    choice: int = Field(..., ge=1, le=5, description="1-based index of the best matching result")
 
 
 class InstructionGenerationResult(BaseModel):
@@ -53,6 +112,8 @@ class InstructionGenerationResult(BaseModel):
 class ModelRetrievalResult(BaseModel):
     """Result of Part 1 - Model Retrieval."""
     
+    model_config = ConfigDict(frozen=True, extra="ignore")
+    
     success: bool = Field(..., description="Whether retrieval was successful")
     error_message: Optional[str] = Field(None, description="Error message if failed")
     search_results: List[OMRSearchResult] = Field(default_factory=list, description="Search results found")
@@ -66,6 +127,42 @@ class ModelRetrievalResult(BaseModel):
 class CompleteModelResult(BaseModel):
     """Complete result including both model retrieval and instruction generation."""
     
+    model_config = ConfigDict(frozen=True, extra="ignore")
+    
     retrieval_result: ModelRetrievalResult = Field(..., description="Model retrieval results")
     instruction_result: Optional[InstructionGenerationResult] = Field(None, description="Instruction generation results")
-    summary: str = Field(..., description="Human-readable summary of the complete process")
+    
+    @computed_field(description="Human-readable summary of the complete process")
+    @cached_property
+    def summary(self) -> str:
+        """Built on first access, since programmatic callers rarely read it."""
+        retrieval = self.retrieval_result
+        if not retrieval.success or not retrieval.selected_result:
+            return f"❌ Model retrieval failed: {retrieval.error_message}"
+        
+        summary_parts = [f"✅ Found model: {retrieval.selected_result.set_number} - {retrieval.selected_result.name}"]
+        
+        instructions = self.instruction_result
+        if instructions is None:
+            return summary_parts[0]
+        
+        if instructions.success:
+            if instructions.step_count > 0:
+                summary_parts.append(f"✅ Generated {len(instructions.step_images)} step images")
+            else:
+                summary_parts.append("✅ No steps found in model")
+            
+            if instructions.bom_csv:
+                summary_parts.append("✅ Generated BOM CSV")
+            
+            if instructions.html_export:
+                summary_parts.append("✅ Generated HTML export")
+        else:
+            summary_parts.append(f"❌ Instruction generation failed: {instructions.error_message}")
+        
+        return " | ".join(summary_parts)
+
+
+# Shared list adapters for bulk validation and JSON encoding of results
+OMR_RESULTS_ADAPTER = TypeAdapter(List[OMRSearchResult])
+MODEL_VARIANTS_ADAPTER = TypeAdapter(List[ModelVariant])
@@ -1,18 +1,266 @@
 """OMR (Official LEGO Model Repository) search functionality."""
 
 import asyncio
-import json
+import os
 import re
 import ssl
-from pathlib import Path
-from typing import List, Optional
-from urllib.parse import urljoin
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from html.parser import HTMLParser
+from operator import itemgetter
+from typing import List, Optional, Tuple
+from urllib.parse import urlencode, urljoin
 
+import aiofiles
 import aiohttp
-from playwright.async_api import async_playwright
+import orjson
+from pydantic import TypeAdapter
 
+from .browser_pool import browser_pool
 from .config import Config
-from .models import ModelRetrievalResult, ModelVariant, OMRSearchResult, PromptAnalysis
+from .disk_cache import DiskCache, cache_key
+from .models import OMR_RESULTS_ADAPTER, ModelVariant, OMRSearchResult, PromptAnalysis
+
+
+# Number of distinct prompts whose analysis is kept in memory
+ANALYSIS_CACHE_SIZE = 256
+
+# Raw OMR search pages kept in memory, keyed by search URL, and for how long (seconds)
+SEARCH_ROWS_CACHE_SIZE = 256
+SEARCH_ROWS_CACHE_TTL = 600
+
+# Bytes read from the network per write when saving a downloaded model
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# No overall deadline for model downloads, but fail if the server goes quiet
+_DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=15, sock_read=60)
+# How long the browser scrape waits for a search to change the results table
+_SEARCH_RESULTS_TIMEOUT_MS = 8000
+
+# How many search strategies may be in flight at once
+PARALLEL_SEARCH_STRATEGIES = 3
+
+# How many model detail pages one service may load at once when fetching variants
+PARALLEL_VARIANT_FETCHES = 4
+
+_YEAR_RE = re.compile(r"\d{4}")
+
+# JSON object wrapped in a markdown code block, as LLMs often reply
+_JSON_FENCE_RE = re.compile(r'```(?:json)?\s*(\{.*?\})\s*```', re.DOTALL)
+
+# More specific theme categories with priority order
+_THEME_CATEGORIES = {
+    # Vehicle types (most specific first)
+    "batmobile": ("batmobile", "bat mobile", "batman car"),
+    "race_car": ("race car", "racing car", "formula", "f1", "nascar", "speed"),
+    "sports_car": ("sports car", "supercar", "ferrari", "lamborghini", "porsche"),
+    "regular_car": ("car", "automobile", "vehicle", "sedan", "coupe"),
+    "truck": ("truck", "pickup", "lorry"),
+    "bus": ("bus", "coach"),
+    "motorcycle": ("motorcycle", "bike", "motorbike"),
+    "train": ("train", "locomotive", "railway", "railroad"),
+    
+    # Aircraft
+    "fighter_jet": ("fighter", "jet", "f-16", "f-22"),
+    "airplane": ("plane", "aircraft", "airplane", "airliner"),
+    "helicopter": ("helicopter", "chopper"),
+    
+    # Space
+    "spaceship": ("spaceship", "spacecraft", "rocket", "shuttle"),
+    
+    # Buildings
+    "house": ("house", "home", "residence"),
+    "castle": ("castle", "fortress", "palace"),
+    "building": ("building", "tower", "skyscraper"),
+    
+    # Other
+    "robot": ("robot", "android", "cyborg"),
+    "ship": ("ship", "boat", "yacht", "cruise"),
+    "tank": ("tank", "armored"),
+}
+
+# Common colors
+_COLORS = (
+    "red", "blue", "green", "yellow", "black", "white", "gray", "grey",
+    "orange", "purple", "pink", "brown", "tan", "lime", "cyan", "magenta"
+)
+
+# Size/constraint keywords
+_CONSTRAINTS = (
+    "small", "large", "big", "tiny", "mini", "micro", "huge",
+    "simple", "complex", "detailed", "basic", "advanced"
+)
+
+# Each theme keyword mapped to its theme, and each theme's rank: themes with more keywords
+# are more specific, and earlier themes win ties
+_KEYWORD_THEMES = {keyword: theme for theme, keywords in _THEME_CATEGORIES.items() for keyword in keywords}
+_THEME_RANK = {theme: (len(keywords), -index) for index, (theme, keywords) in enumerate(_THEME_CATEGORIES.items())}
+
+# Words that carry no meaning for a search
+_COMMON_WORDS = frozenset({"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by", "lego"})
+_FILLER_WORDS = _COMMON_WORDS | {"build", "make", "create"}
+# Core concepts also leave out sizes and colors, which the search terms add separately
+_CORE_CONCEPT_STOP_WORDS = _FILLER_WORDS | {"small", "large", "big", "tiny", "mini", "micro", "huge"} | set(_COLORS)
+
+# Concepts that need semantic analysis rather than a direct keyword match
+_COMPLEX_CONCEPTS = (
+    "futuristic", "steampunk", "cyberpunk", "medieval", "ancient", "modern", "vintage",
+    "flying", "hovering", "levitating", "transforming", "modular", "custom",
+    "battle", "war", "combat", "military", "space", "alien", "fantasy", "sci-fi"
+)
+
+# Semantic concept mapping used when no LLM is available
+_CONCEPT_MAPPINGS = {
+    # Futuristic concepts
+    "futuristic": ("space", "sci-fi", "cyber", "neon", "tech"),
+    "steampunk": ("vintage", "brass", "gear", "steam", "industrial"),
+    "cyberpunk": ("neon", "tech", "cyber", "digital", "matrix"),
+    
+    # Movement concepts
+    "flying": ("aircraft", "plane", "helicopter", "jet", "wing"),
+    "hovering": ("hover", "levitate", "float", "air cushion"),
+    "transforming": ("transform", "convert", "change", "modular"),
+    
+    # Style concepts
+    "medieval": ("castle", "knight", "dragon", "fortress", "ancient"),
+    "modern": ("contemporary", "sleek", "minimalist", "tech"),
+    "vintage": ("classic", "retro", "old", "traditional"),
+    
+    # Function concepts
+    "battle": ("war", "combat", "military", "tank", "fighter"),
+    "space": ("astronaut", "rocket", "shuttle", "alien", "planet"),
+    "fantasy": ("magic", "dragon", "wizard", "mythical", "enchanted"),
+}
+
+# Most specific search terms for themes that OMR names inconsistently
+_THEME_SEARCH_TERMS = {
+    "batmobile": "batmobile batman",
+    "race_car": "race car racing formula",
+    "sports_car": "sports car supercar",
+    "regular_car": "car automobile vehicle",
+    "train": "train locomotive railway",
+}
+
+# Map specific themes to broader categories
+_BROADER_CATEGORIES = {
+    "race_car": "vehicle",
+    "sports_car": "vehicle",
+    "regular_car": "vehicle",
+    "truck": "vehicle",
+    "bus": "vehicle",
+    "motorcycle": "vehicle",
+    "train": "vehicle",
+    "fighter_jet": "aircraft",
+    "airplane": "aircraft",
+    "helicopter": "aircraft",
+    "spaceship": "space",
+    "house": "building",
+    "castle": "building",
+    "building": "building",
+    "robot": "mechanical",
+    "ship": "watercraft",
+    "tank": "military",
+}
+
+# Words in result names that the direct scorer looks for, per kind of model; a single
+# alternation search is cheaper than an any() generator over the words for every row
+_RACE_WORDS_RE = re.compile("race|racing|formula|f1|nascar|speed")
+_TRAIN_WORDS_RE = re.compile("train|railroad|railway|locomotive")
+_CAR_WORDS_RE = re.compile("car|automobile|vehicle")
+_FAST_CAR_WORDS_RE = re.compile("race|racing|sports")
+_SPORTS_CAR_WORDS_RE = re.compile("sports|supercar|ferrari|lamborghini|porsche")
+
+# One alternation each, so a prompt is scanned for all concepts in a single C-level pass.
+# The concept scan uses a lookahead so that overlapping occurrences are all reported.
+_COMPLEX_CONCEPT_RE = re.compile("|".join(map(re.escape, _COMPLEX_CONCEPTS)))
+_CONCEPT_MAPPING_RE = re.compile("(?=(" + "|".join(map(re.escape, _CONCEPT_MAPPINGS)) + "))")
+
+# Every theme keyword, color and constraint, so a prompt can be checked against all of them in one pass
+_PROMPT_TERMS = frozenset(
+    {term for keywords in _THEME_CATEGORIES.values() for term in keywords} | set(_COLORS) | set(_CONSTRAINTS)
+)
+
+# Name fragments that mark a result as clearly off-topic for a theme, one alternation per theme
+_IRRELEVANT_NAME_RES = {
+    theme: re.compile("|".join(map(re.escape, fragments)))
+    for theme, fragments in {
+        "race_car": ("train", "railroad", "railway", "locomotive", "house", "building", "castle"),
+        "train": ("race", "racing", "sports car", "ferrari", "lamborghini"),
+        "aircraft": ("car", "truck", "ship", "boat", "house", "building"),
+        "space": ("car", "truck", "house", "building", "train"),
+        "building": ("car", "truck", "aircraft", "spaceship", "train"),
+    }.items()
+}
+
+# Elements on a model detail page that lead to a downloadable model file
+_DOWNLOAD_LINK_SELECTOR = 'a[href*="download"], a[href*=".mpd"], a[href*=".zip"], button[onclick*="download"]'
+
+# Variant name markers and their scores; a name carrying several markers takes the best score
+_VARIANT_SCORES = {'main': 1.0, 'small': 0.8, 'large': 0.7, 'alternate': 0.5}
+_VARIANT_RE = re.compile("|".join(_VARIANT_SCORES))
+
+
+def _scan_prompt_terms(prompt_lower: str) -> set:
+    """Every theme keyword, color and constraint that occurs in the prompt."""
+    return {term for term in _PROMPT_TERMS if term in prompt_lower}
+
+
+@lru_cache(maxsize=1024)
+def _meaningful_words(prompt_lower: str) -> Tuple[str, ...]:
+    """Words of a lowercased prompt longer than two letters, without common words."""
+    # Shared by the direct analysis, the simple-prompt check and the core-concept strategy
+    return tuple(word for word in prompt_lower.split() if word not in _COMMON_WORDS and len(word) > 2)
+
+
+class _OMRTableParser(HTMLParser):
+    """Collects the cell texts and first link of each row in a results table body."""
+    
+    def __init__(self):
+        super().__init__()
+        self.rows: List[tuple] = []
+        self._in_tbody = False
+        self._row: Optional[List[str]] = None
+        self._cell: Optional[List[str]] = None
+        self._row_link: Optional[str] = None
+        self._name_link: Optional[str] = None
+        # Value pre-filled in the page's search box, which shows the server applied the query
+        self.search_value: Optional[str] = None
+    
+    def handle_starttag(self, tag, attrs):
+        if tag == "input":
+            attributes = dict(attrs)
+            if self.search_value is None and "search" in (attributes.get("type"), attributes.get("name")):
+                self.search_value = attributes.get("value")
+        elif tag == "tbody":
+            self._in_tbody = True
+        elif not self._in_tbody:
+            return
+        elif tag == "tr":
+            self._row, self._row_link, self._name_link = [], None, None
+        elif tag == "td" and self._row is not None:
+            self._cell = []
+        elif tag == "a" and self._row is not None:
+            href = dict(attrs).get("href")
+            if href:
+                # Like the browser scrape, prefer the link in the name cell (the third one)
+                if self._name_link is None and self._cell is not None and len(self._row) == 2:
+                    self._name_link = href
+                if self._row_link is None:
+                    self._row_link = href
+    
+    def handle_endtag(self, tag):
+        if tag == "td" and self._cell is not None and self._row is not None:
+            self._row.append(" ".join("".join(self._cell).split()))
+            self._cell = None
+        elif tag == "tr" and self._row is not None:
+            self.rows.append((self._row, self._name_link or self._row_link))
+            self._row = None
+        elif tag == "tbody":
+            self._in_tbody = False
+    
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
 
 
 class OMRSearchService:
@@ -21,9 +269,73 @@ class OMRSearchService:
     def __init__(self, config: Config):
         self.config = config
         self.llm = None  # Will be set by the agent if available
+        self._search_cache = DiskCache(config.cache_dir / "omr", ttl_seconds=config.omr_cache_ttl, adapter=OMR_RESULTS_ADAPTER)
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        # Recent raw search pages (expiry, rows) by search URL, most recently used last
+        self._search_rows_cache: "OrderedDict[str, tuple]" = OrderedDict()
+        # Recent prompt analyses (expiry, analysis), most recently used last
+        self._analysis_cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._analysis_disk_cache = DiskCache(
+            config.cache_dir / "analysis", ttl_seconds=config.omr_cache_ttl, adapter=TypeAdapter(PromptAnalysis)
+        )
+        # Shared by every caller so speculative and concurrent variant fetches stay polite to OMR
+        self._variant_fetch_limit = asyncio.Semaphore(PARALLEL_VARIANT_FETCHES)
+    
+    def _get_http_session(self) -> aiohttp.ClientSession:
+        """Return the pooled HTTP session, creating it on first use."""
+        if self._http_session is None or self._http_session.closed:
+            # Create SSL context that doesn't verify certificates (for development)
+            ssl_context = ssl.create_default_context()
+            ssl_context.check_hostname = False
+            ssl_context.verify_mode = ssl.CERT_NONE
+            
+            # Keep connections and DNS lookups to library.ldraw.org warm between downloads
+            connector = aiohttp.TCPConnector(
+                ssl=ssl_context,
+                limit=20,
+                limit_per_host=8,
+                ttl_dns_cache=300,
+                keepalive_timeout=60
+            )
+            # Bound every request so a stalled connection cannot hold a pooled slot indefinitely
+            timeout = aiohttp.ClientTimeout(total=120, sock_connect=15)
+            self._http_session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._http_session
+    
+    async def aclose(self):
+        """Close the pooled HTTP session."""
+        if self._http_session is not None:
+            await self._http_session.close()
+            self._http_session = None
     
     async def analyze_prompt(self, prompt: str) -> PromptAnalysis:
-        """Analyze user prompt using hybrid approach: direct + semantic understanding."""
+        """Analyze a prompt, reusing a recent analysis of the same text."""
+        key = PromptAnalysis.cache_key(prompt)
+        cached = self._analysis_cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self._analysis_cache.move_to_end(key)
+            print(f"⚡ Using cached prompt analysis for '{prompt}'")
+            return cached[1]
+        
+        # Fall back to analyses persisted by earlier runs before asking the LLM again
+        analysis = self._analysis_disk_cache.get(key)
+        if analysis is not None:
+            print(f"⚡ Using stored prompt analysis for '{prompt}'")
+        else:
+            analysis, is_fallback = await self._analyze_prompt_uncached(prompt)
+            # A fallback only stands in for a missing or failing LLM, so it is
+            # kept in memory and not pinned on disk for later runs
+            if not is_fallback:
+                self._analysis_disk_cache.set(key, analysis)
+        
+        self._analysis_cache[key] = (time.monotonic() + self.config.omr_cache_ttl, analysis)
+        self._analysis_cache.move_to_end(key)
+        while len(self._analysis_cache) > ANALYSIS_CACHE_SIZE:
+            self._analysis_cache.popitem(last=False)
+        return analysis
+    
+    async def _analyze_prompt_uncached(self, prompt: str) -> Tuple[PromptAnalysis, bool]:
+        """Analyze user prompt using hybrid approach: direct + semantic understanding; the flag marks a fallback analysis."""
         # First, try direct analysis for simple prompts
         direct_analysis = self._analyze_prompt_direct(prompt)
         
@@ -34,11 +346,11 @@ class OMRSearchService:
             print(f"   Colors: {direct_analysis.colors}")
             print(f"   Constraints: {direct_analysis.constraints}")
             print(f"   Keywords: {direct_analysis.keywords}")
-            return direct_analysis
+            return direct_analysis, False
         
         # For complex/novel prompts, use semantic analysis
         print(f"🧠 Using semantic analysis for complex prompt '{prompt}'")
-        semantic_analysis = await self._analyze_prompt_semantic(prompt, direct_analysis)
+        semantic_analysis, is_fallback = await self._analyze_prompt_semantic(prompt, direct_analysis)
         
         print(f"🔍 Semantic analysis for '{prompt}':")
         print(f"   Theme: {semantic_analysis.theme}")
@@ -48,78 +360,25 @@ class OMRSearchService:
         print(f"   Related concepts: {getattr(semantic_analysis, 'related_concepts', [])}")
         print(f"   Search hints: {getattr(semantic_analysis, 'search_hints', [])}")
         
-        return semantic_analysis
+        return semantic_analysis, is_fallback
     
     def _analyze_prompt_direct(self, prompt: str) -> PromptAnalysis:
         """Direct keyword-based analysis for simple prompts."""
-        # More specific theme categories with priority order
-        theme_categories = {
-            # Vehicle types (most specific first)
-            "batmobile": ["batmobile", "bat mobile", "batman car"],
-            "race_car": ["race car", "racing car", "formula", "f1", "nascar", "speed"],
-            "sports_car": ["sports car", "supercar", "ferrari", "lamborghini", "porsche"],
-            "regular_car": ["car", "automobile", "vehicle", "sedan", "coupe"],
-            "truck": ["truck", "pickup", "lorry"],
-            "bus": ["bus", "coach"],
-            "motorcycle": ["motorcycle", "bike", "motorbike"],
-            "train": ["train", "locomotive", "railway", "railroad"],
-            
-            # Aircraft
-            "fighter_jet": ["fighter", "jet", "f-16", "f-22"],
-            "airplane": ["plane", "aircraft", "airplane", "airliner"],
-            "helicopter": ["helicopter", "chopper"],
-            
-            # Space
-            "spaceship": ["spaceship", "spacecraft", "rocket", "shuttle"],
-            
-            # Buildings
-            "house": ["house", "home", "residence"],
-            "castle": ["castle", "fortress", "palace"],
-            "building": ["building", "tower", "skyscraper"],
-            
-            # Other
-            "robot": ["robot", "android", "cyborg"],
-            "ship": ["ship", "boat", "yacht", "cruise"],
-            "tank": ["tank", "armored"],
-        }
-        
-        # Common colors
-        colors = [
-            "red", "blue", "green", "yellow", "black", "white", "gray", "grey",
-            "orange", "purple", "pink", "brown", "tan", "lime", "cyan", "magenta"
-        ]
-        
-        # Size/constraint keywords
-        constraints = [
-            "small", "large", "big", "tiny", "mini", "micro", "huge",
-            "simple", "complex", "detailed", "basic", "advanced"
-        ]
-        
         prompt_lower = prompt.lower()
+        found_terms = _scan_prompt_terms(prompt_lower)
         
         # Find the most specific theme match
-        found_theme = "general"
-        theme_priority = 0
-        
-        for theme_name, keywords in theme_categories.items():
-            for keyword in keywords:
-                if keyword in prompt_lower:
-                    # Use priority based on specificity (more specific themes have higher priority)
-                    current_priority = len(keywords)  # More keywords = more specific
-                    if current_priority > theme_priority:
-                        found_theme = theme_name
-                        theme_priority = current_priority
-                    break
+        found_themes = {_KEYWORD_THEMES[term] for term in found_terms if term in _KEYWORD_THEMES}
+        found_theme = max(found_themes, key=_THEME_RANK.__getitem__, default="general")
         
         # Extract colors
-        found_colors = [color for color in colors if color in prompt_lower]
+        found_colors = [color for color in _COLORS if color in found_terms]
         
         # Extract constraints
-        found_constraints = [constraint for constraint in constraints if constraint in prompt_lower]
+        found_constraints = [constraint for constraint in _CONSTRAINTS if constraint in found_terms]
         
         # Extract all meaningful keywords (excluding common words)
-        common_words = {"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by", "lego"}
-        keywords = [word for word in prompt_lower.split() if word not in common_words and len(word) > 2]
+        keywords = _meaningful_words(prompt_lower)
         
         return PromptAnalysis(
             theme=found_theme,
@@ -137,35 +396,29 @@ class OMRSearchService:
         # 2. Match a known theme category
         # 3. Don't contain complex concepts
         
-        meaningful_words = [word for word in prompt_lower.split() if len(word) > 2 and word not in {"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by", "lego"}]
+        meaningful_words = _meaningful_words(prompt_lower)
         
         # Check for complex concepts that need semantic analysis
-        complex_concepts = [
-            "futuristic", "steampunk", "cyberpunk", "medieval", "ancient", "modern", "vintage",
-            "flying", "hovering", "levitating", "transforming", "modular", "custom",
-            "battle", "war", "combat", "military", "space", "alien", "fantasy", "sci-fi"
-        ]
-        
-        has_complex_concept = any(concept in prompt_lower for concept in complex_concepts)
+        has_complex_concept = _COMPLEX_CONCEPT_RE.search(prompt_lower) is not None
         is_short_and_simple = len(meaningful_words) <= 3 and analysis.theme != "general" and not has_complex_concept
         
         return is_short_and_simple
     
-    async def _analyze_prompt_semantic(self, prompt: str, direct_analysis: PromptAnalysis) -> PromptAnalysis:
-        """Use LLM to analyze complex prompts semantically."""
+    async def _analyze_prompt_semantic(self, prompt: str, direct_analysis: PromptAnalysis) -> Tuple[PromptAnalysis, bool]:
+        """Use LLM to analyze complex prompts semantically; the flag marks a fallback analysis."""
         try:
             # Use the existing LLM setup if available
             if hasattr(self, 'llm') and self.llm:
                 return await self._analyze_with_llm(prompt, direct_analysis)
             else:
                 # Fallback to enhanced direct analysis for now
-                return self._analyze_prompt_enhanced(prompt, direct_analysis)
+                return self._analyze_prompt_enhanced(prompt, direct_analysis), True
         except Exception as e:
             print(f"⚠️  Semantic analysis failed, falling back to enhanced direct analysis: {e}")
-            return self._analyze_prompt_enhanced(prompt, direct_analysis)
+            return self._analyze_prompt_enhanced(prompt, direct_analysis), True
     
-    async def _analyze_with_llm(self, prompt: str, direct_analysis: PromptAnalysis) -> PromptAnalysis:
-        """Analyze prompt using LLM for semantic understanding."""
+    async def _analyze_with_llm(self, prompt: str, direct_analysis: PromptAnalysis) -> Tuple[PromptAnalysis, bool]:
+        """Analyze prompt using LLM for semantic understanding; the flag marks a fallback analysis."""
         try:
             system_prompt = f"""
             Analyze this LEGO model request: "{prompt}"
@@ -203,39 +456,33 @@ class OMRSearchService:
                 raise ValueError("No output attribute in LLM response")
             
             # Parse the JSON response (handle markdown code blocks)
-            import json
-            import re
             try:
                 # Extract JSON from markdown code blocks if present
-                json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', output_text, re.DOTALL)
+                json_match = _JSON_FENCE_RE.search(output_text) if "```" in output_text else None
                 if json_match:
                     json_text = json_match.group(1)
                 else:
                     json_text = output_text
                 
-                llm_analysis = json.loads(json_text)
+                llm_analysis = orjson.loads(json_text)
                 
-                # Create enhanced analysis with LLM results
-                enhanced_analysis = PromptAnalysis(
+                # Create enhanced analysis with LLM results and semantic information
+                return PromptAnalysis(
                     theme=llm_analysis.get('theme', direct_analysis.theme),
                     colors=llm_analysis.get('colors', direct_analysis.colors),
                     constraints=llm_analysis.get('constraints', direct_analysis.constraints),
-                    keywords=llm_analysis.get('keywords', direct_analysis.keywords)
-                )
+                    keywords=llm_analysis.get('keywords', direct_analysis.keywords),
+                    related_concepts=llm_analysis.get('related_concepts', ()),
+                    search_hints=llm_analysis.get('search_hints', ())
+                ), False
                 
-                # Add semantic information
-                enhanced_analysis.related_concepts = llm_analysis.get('related_concepts', [])
-                enhanced_analysis.search_hints = llm_analysis.get('search_hints', [])
-                
-                return enhanced_analysis
-                
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 print(f"⚠️  Failed to parse LLM response as JSON, falling back to enhanced analysis")
-                return self._analyze_prompt_enhanced(prompt, direct_analysis)
+                return self._analyze_prompt_enhanced(prompt, direct_analysis), True
                 
         except Exception as e:
             print(f"⚠️  LLM analysis failed: {e}, falling back to enhanced analysis")
-            return self._analyze_prompt_enhanced(prompt, direct_analysis)
+            return self._analyze_prompt_enhanced(prompt, direct_analysis), True
     
     def _analyze_prompt_enhanced(self, prompt: str, direct_analysis: PromptAnalysis) -> PromptAnalysis:
         """Enhanced direct analysis with better concept extraction."""
@@ -246,102 +493,116 @@ class OMRSearchService:
         related_concepts = []
         search_hints = []
         
-        # Add semantic concept mapping
-        concept_mappings = {
-            # Futuristic concepts
-            "futuristic": ["space", "sci-fi", "cyber", "neon", "tech"],
-            "steampunk": ["vintage", "brass", "gear", "steam", "industrial"],
-            "cyberpunk": ["neon", "tech", "cyber", "digital", "matrix"],
-            
-            # Movement concepts
-            "flying": ["aircraft", "plane", "helicopter", "jet", "wing"],
-            "hovering": ["hover", "levitate", "float", "air cushion"],
-            "transforming": ["transform", "convert", "change", "modular"],
-            
-            # Style concepts
-            "medieval": ["castle", "knight", "dragon", "fortress", "ancient"],
-            "modern": ["contemporary", "sleek", "minimalist", "tech"],
-            "vintage": ["classic", "retro", "old", "traditional"],
-            
-            # Function concepts
-            "battle": ["war", "combat", "military", "tank", "fighter"],
-            "space": ["astronaut", "rocket", "shuttle", "alien", "planet"],
-            "fantasy": ["magic", "dragon", "wizard", "mythical", "enchanted"]
-        }
-        
         # Find related concepts
-        for concept, related in concept_mappings.items():
-            if concept in prompt_lower:
+        found_concepts = set(_CONCEPT_MAPPING_RE.findall(prompt_lower))
+        for concept, related in _CONCEPT_MAPPINGS.items():
+            if concept in found_concepts:
                 related_concepts.extend(related)
                 search_hints.extend(related)
         
-        # Enhanced keyword extraction
-        enhanced_keywords = direct_analysis.keywords.copy()
-        enhanced_keywords.extend(related_concepts)
-        
-        # Remove duplicates and common words
-        common_words = {"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by", "lego", "build", "make", "create"}
-        enhanced_keywords = [word for word in enhanced_keywords if word not in common_words and len(word) > 2]
-        enhanced_keywords = list(dict.fromkeys(enhanced_keywords))  # Remove duplicates while preserving order
+        # Enhanced keyword extraction, dropping common words and duplicates while preserving order
+        enhanced_keywords = []
+        seen = set()
+        for word in (*direct_analysis.keywords, *related_concepts):
+            if word not in seen and word not in _FILLER_WORDS and len(word) > 2:
+                seen.add(word)
+                enhanced_keywords.append(word)
         
-        # Create enhanced analysis
-        enhanced_analysis = PromptAnalysis(
+        # Create enhanced analysis, with semantic information
+        return PromptAnalysis(
             theme=enhanced_theme,
             colors=direct_analysis.colors,
             constraints=direct_analysis.constraints,
-            keywords=enhanced_keywords
+            keywords=enhanced_keywords,
+            related_concepts=related_concepts,
+            search_hints=search_hints
         )
+    
+    async def search_omr(
+        self,
+        analysis: PromptAnalysis,
+        original_prompt: str = "",
+        force_refresh: bool = False
+    ) -> List[OMRSearchResult]:
+        """Search OMR for relevant LEGO models, reusing cached results when available."""
+        key = cache_key(original_prompt, analysis.theme, list(analysis.keywords))
+        
+        if not force_refresh:
+            cached_results = self._search_cache.get(key)
+            if cached_results is not None:
+                print(f"⚡ Using cached OMR results for '{original_prompt}' ({len(cached_results)} results)")
+                return cached_results
+        else:
+            self._search_rows_cache.clear()
         
-        # Add semantic information as attributes
-        enhanced_analysis.related_concepts = related_concepts
-        enhanced_analysis.search_hints = search_hints
-        
-        return enhanced_analysis
+        results = await self._search_omr_uncached(analysis, original_prompt)
+        if results:
+            self._search_cache.set(key, results)
+        return results
     
-    async def search_omr(self, analysis: PromptAnalysis, original_prompt: str = "") -> List[OMRSearchResult]:
+    async def _search_omr_uncached(self, analysis: PromptAnalysis, original_prompt: str = "") -> List[OMRSearchResult]:
         """Search OMR for relevant LEGO models using Playwright."""
         # Try multiple search strategies
-        search_strategies = self._generate_search_strategies(analysis, original_prompt)
+        search_strategies = []
+        search_urls = []
+        for strategy_name, search_terms in self._generate_search_strategies(analysis, original_prompt):
+            # Strategies can produce the same terms; searching them twice would only repeat a result
+            search_url = f"{self.config.omr_search_url}?{urlencode({'search': search_terms})}"
+            if search_url not in search_urls:
+                search_strategies.append((strategy_name, search_terms))
+                search_urls.append(search_url)
         
         print(f"🎯 Generated {len(search_strategies)} search strategies:")
         for i, (strategy_name, search_terms) in enumerate(search_strategies, 1):
             print(f"   {i}. {strategy_name}: '{search_terms}'")
         
-        # Try strategies in order of preference, stop at first good result
-        for strategy_name, search_terms in search_strategies:
-            search_url = f"{self.config.omr_search_url}?search={search_terms}"
+        # Searches for the next few strategies run ahead concurrently, but results are
+        # still judged in order of preference; whatever is left running is cancelled
+        search_tasks: List[Optional[asyncio.Task]] = [None] * len(search_strategies)
+        
+        def start_search(index: int) -> None:
+            strategy_name, search_terms = search_strategies[index]
             print(f"Trying search strategy: {strategy_name} with terms: {search_terms}")
-            
-            results = await self._perform_search(search_url, analysis, search_terms)
-            
-            if not results:
-                print(f"No results found with strategy: {strategy_name}")
-                continue
-            
-            # Show results for debugging
+            search_tasks[index] = asyncio.create_task(self._perform_search(search_urls[index], analysis, search_terms))
+        
+        results = []
+        try:
+            # Try strategies in order of preference, stop at first good result
+            for index, (strategy_name, _) in enumerate(search_strategies):
+                for ahead in range(index, min(index + PARALLEL_SEARCH_STRATEGIES, len(search_strategies))):
+                    if search_tasks[ahead] is None:
+                        start_search(ahead)
+                
+                results = await search_tasks[index]
+                
+                if not results:
+                    print(f"No results found with strategy: {strategy_name}")
+                    continue
+                
+                # Show results for debugging (_perform_search returns them best first)
                 print(f"Found {len(results)} results with strategy: {strategy_name}")
-            if results:
-                top_result = max(results, key=lambda x: x.relevance_score)
+                top_result = results[0]
                 print(f"   Top result: {top_result.name} (score: {top_result.relevance_score:.3f})")
-            
-            # For exact_prompt, be more lenient - any results are good
-            if strategy_name == "exact_prompt" and results:
-                print(f"✅ Using exact_prompt strategy with {len(results)} results")
-                results.sort(key=lambda x: x.relevance_score, reverse=True)
-                return results
-            
-            # For other strategies, require at least 3 results or a high score
-            if len(results) >= 3 or (results and max(r.relevance_score for r in results) > 0.3):
-                print(f"✅ Using {strategy_name} strategy with {len(results)} results")
-                results.sort(key=lambda x: x.relevance_score, reverse=True)
-                return results
-            else:
-                print(f"   Strategy {strategy_name} not good enough, trying next...")
+                
+                # For exact_prompt, be more lenient - any results are good
+                if strategy_name == "exact_prompt":
+                    print(f"✅ Using exact_prompt strategy with {len(results)} results")
+                    return results
+                
+                # For other strategies, require at least 3 results or a high score
+                if len(results) >= 3 or top_result.relevance_score > 0.3:
+                    print(f"✅ Using {strategy_name} strategy with {len(results)} results")
+                    return results
+                else:
+                    print(f"   Strategy {strategy_name} not good enough, trying next...")
+        finally:
+            for task in search_tasks:
+                if task is not None and not task.done():
+                    task.cancel()
         
         # If no strategy worked well, return the last attempt
-        if 'results' in locals() and results:
+        if results:
             print(f"⚠️  No strategy was ideal, using last attempt with {len(results)} results")
-            results.sort(key=lambda x: x.relevance_score, reverse=True)
             return results
         else:
             print("❌ No results found with any strategy")
@@ -371,16 +632,9 @@ class OMRSearchService:
         strategies = []
         
         # Strategy 2: Most specific theme terms
-        if analysis.theme == "batmobile":
-            strategies.append(("batmobile_specific", "batmobile batman"))
-        elif analysis.theme == "race_car":
-            strategies.append(("race_car_specific", "race car racing formula"))
-        elif analysis.theme == "sports_car":
-            strategies.append(("sports_car_specific", "sports car supercar"))
-        elif analysis.theme == "regular_car":
-            strategies.append(("regular_car_specific", "car automobile vehicle"))
-        elif analysis.theme == "train":
-            strategies.append(("train_specific", "train locomotive railway"))
+        theme_terms = _THEME_SEARCH_TERMS.get(analysis.theme)
+        if theme_terms:
+            strategies.append((f"{analysis.theme}_specific", theme_terms))
         
         # Strategy 3: Core concept (extract the main word)
         core_concept = self._extract_core_concept(original_prompt)
@@ -429,84 +683,98 @@ class OMRSearchService:
         prompt_lower = prompt.lower()
         
         # Remove common words and extract meaningful terms
-        common_words = {"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by", "lego", "build", "make", "create", "small", "large", "big", "tiny", "mini", "micro", "huge", "red", "blue", "green", "yellow", "black", "white", "gray", "grey", "orange", "purple", "pink", "brown", "tan", "lime", "cyan", "magenta"}
-        
-        words = [word for word in prompt_lower.split() if word not in common_words and len(word) > 2]
+        words = [word for word in _meaningful_words(prompt_lower) if word not in _CORE_CONCEPT_STOP_WORDS]
         
         # Return the most important words (up to 3)
         return " ".join(words[:3])
     
     def _get_broader_category(self, analysis: PromptAnalysis) -> str:
         """Get a broader category for the analysis."""
-        # Map specific themes to broader categories
-        broader_mapping = {
-            "race_car": "vehicle",
-            "sports_car": "vehicle", 
-            "regular_car": "vehicle",
-            "truck": "vehicle",
-            "bus": "vehicle",
-            "motorcycle": "vehicle",
-            "train": "vehicle",
-            "fighter_jet": "aircraft",
-            "airplane": "aircraft",
-            "helicopter": "aircraft",
-            "spaceship": "space",
-            "house": "building",
-            "castle": "building",
-            "building": "building",
-            "robot": "mechanical",
-            "ship": "watercraft",
-            "tank": "military"
-        }
-        
-        return broader_mapping.get(analysis.theme, "general")
+        return _BROADER_CATEGORIES.get(analysis.theme, "general")
     
     async def _perform_search(self, search_url: str, analysis: PromptAnalysis, search_terms: str) -> List[OMRSearchResult]:
         """Perform a single search and return results."""
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context()
-            page = await context.new_page()
+        # Different prompts often end up with the same strategy terms, so reuse recent pages
+        cached = self._search_rows_cache.get(search_url)
+        if cached is not None and cached[0] > time.monotonic():
+            self._search_rows_cache.move_to_end(search_url)
+            rows = cached[1]
+            print(f"⚡ Using cached OMR rows for '{search_terms}' ({len(rows)} rows)")
+        else:
+            rows = await self._scrape_search_rows(search_url, search_terms)
+            # Scoring only compares lowercase text; fold case once per row rather than on every ranking
+            for row in rows:
+                row['name_lower'] = row['name'].lower()
+                row['theme_lower'] = row['theme'].lower()
+            if rows:
+                self._search_rows_cache[search_url] = (time.monotonic() + SEARCH_ROWS_CACHE_TTL, rows)
+                self._search_rows_cache.move_to_end(search_url)
+                while len(self._search_rows_cache) > SEARCH_ROWS_CACHE_SIZE:
+                    self._search_rows_cache.popitem(last=False)
+        
+        # Scores depend on the analysis, so rank a fresh copy of the raw rows each time
+        return self._rank_search_rows(analysis, [dict(row) for row in rows])
+    
+    async def _scrape_search_rows(self, search_url: str, search_terms: str) -> List[dict]:
+        """Load one OMR search and return its raw result rows."""
+        # OMR may serve the result table in the initial HTML; that avoids the browser entirely
+        rows = await self._fetch_search_rows(search_url, search_terms)
+        if rows:
+            print(f"⚡ Parsed {len(rows)} results from the OMR page without a browser")
+            return rows
+        
+        # A fresh context on the shared browser starts without cookies or cache,
+        # so each strategy is isolated without paying for a Chromium launch
+        context = await browser_pool.new_context()
+        page = await context.new_page()
+        
+        try:
+            # Navigate to the OMR sets page first
+            await page.goto("https://library.ldraw.org/omr/sets", wait_until='networkidle')
+            
+            # Find and fill the search input
+            search_input = await page.wait_for_selector('input[type="search"], input[name="search"], input[placeholder*="search" i]', timeout=10000)
+            
+            # The unfiltered listing is already in the table, so remember it to tell when the search has replaced it
+            initial_rows = await page.evaluate("() => document.querySelector('table tbody')?.innerText ?? ''")
             
-            # Clear any potential cache issues
-            await context.clear_cookies()
+            await search_input.fill("")  # Clear the input
+            await search_input.fill(search_terms)
             
+            # Submit the search (try different methods)
             try:
-                # Navigate to the OMR sets page first
-                await page.goto("https://library.ldraw.org/omr/sets", wait_until='networkidle')
-                await page.wait_for_timeout(2000)
-                
-                # Find and fill the search input
-                search_input = await page.wait_for_selector('input[type="search"], input[name="search"], input[placeholder*="search" i]', timeout=10000)
-                await search_input.fill("")  # Clear the input
-                await search_input.fill(search_terms)
-                
-                # Submit the search (try different methods)
-                try:
-                    # Try pressing Enter
-                    await search_input.press('Enter')
-                except:
-                    # Try clicking a search button
-                    search_button = await page.wait_for_selector('button[type="submit"], input[type="submit"], .search-button', timeout=5000)
-                    await search_button.click()
-                
-                # Wait for results to load
-                await page.wait_for_timeout(3000)
-                
-                # Wait longer for dynamic content to load
-                await page.wait_for_timeout(5000)  # Give more time for JavaScript to load results
-                
-                # Wait for the results to load - be more specific about what we're looking for
-                try:
-                    # Wait for the actual results table with data
-                    await page.wait_for_selector('table tbody tr', timeout=15000)
-                    # Wait a bit more to ensure all results are loaded
-                    await page.wait_for_timeout(2000)
-                except:
-                    print("No table rows found, trying alternative selectors...")
-                    # If no table rows found, try other selectors
-                    await page.wait_for_selector('table, .table, [data-testid="results"], .results', timeout=5000)
-                
+                # Try pressing Enter
+                await search_input.press('Enter')
+            except:
+                # Try clicking a search button
+                search_button = await page.wait_for_selector('button[type="submit"], input[type="submit"], .search-button', timeout=5000)
+                await search_button.click()
+            
+            # Wait for the results to load - be more specific about what we're looking for
+            try:
+                # Wait for the table to hold rows that differ from the unfiltered listing,
+                # or for the page's empty-state message, instead of sleeping for a fixed time.
+                # A search whose rows match the unfiltered listing never changes the table,
+                # so that case only costs the short timeout
+                await page.wait_for_function(
+                    """(initialRows) => {
+                        const body = document.querySelector('table tbody');
+                        if (body === null || body.rows.length === 0) {
+                            return /no (results|records|matching)/i.test(document.body.innerText);
+                        }
+                        return body.innerText !== initialRows;
+                    }""",
+                    arg=initial_rows,
+                    polling=100,
+                    timeout=_SEARCH_RESULTS_TIMEOUT_MS
+                )
+            except:
+                print("No table rows found, trying alternative selectors...")
+                # If no table rows found, try other selectors
+                await page.wait_for_selector('table, .table, [data-testid="results"], .results', timeout=5000)
+            
+            # Page diagnostics cost extra browser round trips and a full DOM dump, so only when debugging
+            if self.config.debug:
                 # Debug: Check what's actually on the page
                 page_title = await page.title()
                 print(f"Page title: {page_title}")
@@ -519,162 +787,170 @@ class OMRSearchService:
                 html_content = await page.content()
                 if "Red Race Car" in html_content:
                     print("✅ Found 'Red Race Car' in search results!")
-                
-                # Extract results from the page
-                results = await page.evaluate("""
-                    () => {
-                        const results = [];
-                        
-                        // Look for table rows in tbody
-                        const tableRows = document.querySelectorAll('table tbody tr');
-                        
-                        for (const row of tableRows) {
-                            try {
-                                const cells = row.querySelectorAll('td');
-                                console.log('Row has', cells.length, 'cells');
+            
+            # Extract results from the page
+            results = await page.evaluate("""
+                () => {
+                    const results = [];
+                    
+                    // Look for table rows in tbody
+                    const tableRows = document.querySelectorAll('table tbody tr');
+                    
+                    for (const row of tableRows) {
+                        try {
+                            const cells = row.querySelectorAll('td');
+                            console.log('Row has', cells.length, 'cells');
+                            
+                            if (cells.length >= 5) {
+                                // OMR table structure: [empty, set_number, name, theme, year, ...]
+                                const setNumber = cells[1]?.textContent?.trim() || '';
+                                const name = cells[2]?.textContent?.trim() || '';
+                                const theme = cells[3]?.textContent?.trim() || '';
+                                const yearText = cells[4]?.textContent?.trim() || '';
+                                
+                                console.log('Parsed:', {setNumber, name, theme, yearText});
                                 
-                                if (cells.length >= 5) {
-                                    // OMR table structure: [empty, set_number, name, theme, year, ...]
-                                    const setNumber = cells[1]?.textContent?.trim() || '';
-                                    const name = cells[2]?.textContent?.trim() || '';
-                                    const theme = cells[3]?.textContent?.trim() || '';
-                                    const yearText = cells[4]?.textContent?.trim() || '';
-                                    
-                                    console.log('Parsed:', {setNumber, name, theme, yearText});
-                                    
-                                    // Find detail URL (usually in the name cell)
-                                    const link = cells[2]?.querySelector('a') || row.querySelector('a');
-                                    const detailUrl = link ? link.href : '';
-                                    
-                                    if (setNumber && name) {
-                                        results.push({
-                                            set_number: setNumber,
-                                            name: name,
-                                            theme: theme,
-                                            year: yearText.match(/\\d{4}/) ? parseInt(yearText.match(/\\d{4}/)[0]) : null,
-                                            detail_url: detailUrl
-                                        });
-                                    }
+                                // Find detail URL (usually in the name cell)
+                                const link = cells[2]?.querySelector('a') || row.querySelector('a');
+                                const detailUrl = link ? link.href : '';
+                                
+                                if (setNumber && name) {
+                                    results.push({
+                                        set_number: setNumber,
+                                        name: name,
+                                        theme: theme,
+                                        year: yearText.match(/\\d{4}/) ? parseInt(yearText.match(/\\d{4}/)[0]) : null,
+                                        detail_url: detailUrl
+                                    });
                                 }
-                            } catch (e) {
-                                console.log('Error parsing row:', e);
                             }
+                        } catch (e) {
+                            console.log('Error parsing row:', e);
                         }
-                        
-                        console.log('Total results found:', results.length);
-                        return results;
                     }
-                """)
-                
-                # Convert to OMRSearchResult objects and calculate relevance scores
-                search_results = []
-                for result_data in results:
-                    relevance_score = self._calculate_relevance_score(
-                        analysis, 
-                        result_data['set_number'], 
-                        result_data['name'], 
-                        result_data['theme']
-                    )
                     
-                    result = OMRSearchResult(
-                        set_number=result_data['set_number'],
-                        name=result_data['name'],
-                        theme=result_data['theme'],
-                        year=result_data['year'],
-                        detail_url=result_data['detail_url'],
-                        relevance_score=relevance_score
-                    )
-                    search_results.append(result)
-                
-                # Sort by relevance score (descending)
-                search_results.sort(key=lambda x: x.relevance_score, reverse=True)
-                
-                # Debug: Print first few results to see what we're getting
-                if search_results:
-                    print(f"Found {len(search_results)} results from OMR")
-                
-                return search_results
-                
-            except Exception as e:
-                print(f"Error searching OMR: {e}")
-                return []
-            finally:
-                await browser.close()
-    
-    def _calculate_relevance_score(
-        self, 
-        analysis: PromptAnalysis, 
-        set_number: str, 
-        name: str, 
-        theme: str
-    ) -> float:
-        """Calculate relevance score using hybrid approach."""
-        score = 0.0
-        name_lower = name.lower()
-        theme_lower = theme.lower()
+                    console.log('Total results found:', results.length);
+                    return results;
+                }
+            """)
+            
+            return results
+            
+        except Exception as e:
+            print(f"Error searching OMR: {e}")
+            return []
+        finally:
+            await context.close()
+    
+    async def _fetch_search_rows(self, search_url: str, search_terms: str) -> List[dict]:
+        """Fetch the search page over plain HTTP and parse its result table, if it is server-rendered."""
+        try:
+            session = self._get_http_session()
+            async with session.get(search_url, timeout=aiohttp.ClientTimeout(total=15)) as response:
+                if response.status != 200:
+                    return []
+                html = await response.text()
+        except Exception as e:
+            print(f"⚠️  Direct OMR fetch failed, using the browser: {e}")
+            return []
         
-        # Check if this is a simple or complex analysis
-        is_simple = not (analysis.related_concepts and len(analysis.related_concepts) > 0)
+        parser = _OMRTableParser()
+        parser.feed(html)
+        parser.close()
         
-        if is_simple:
-            # Use direct scoring for simple prompts
-            score = self._calculate_direct_relevance_score(analysis, name_lower, theme_lower)
-        else:
+        # An unfiltered listing would look like results too, so only trust a page that echoes the query
+        if (parser.search_value or "").strip().lower() != search_terms.strip().lower():
+            return []
+        
+        return [
+            {
+                'set_number': cells[1],
+                'name': cells[2],
+                'theme': cells[3],
+                'year': int(year.group()) if (year := _YEAR_RE.search(cells[4])) else None,
+                'detail_url': urljoin(search_url, link) if link else '',
+            }
+            for cells, link in parser.rows
+            if len(cells) >= 5 and cells[1] and cells[2]
+        ]
+    
+    def _rank_search_rows(self, analysis: PromptAnalysis, results: List[dict]) -> List[OMRSearchResult]:
+        """Score scraped rows and turn them into results, best first."""
+        # Calculate relevance scores, then validate all rows into OMRSearchResult objects at once
+        self._calculate_relevance_scores(analysis, results)
+        # Sort by relevance score (descending) on the raw rows, before building models
+        results.sort(key=itemgetter('relevance_score'), reverse=True)
+        # A set can appear on more than one row; keep its best-scoring row only
+        unique_rows = {}
+        for result_data in results:
+            unique_rows.setdefault(result_data['set_number'], result_data)
+        return OMRSearchResult.validate_many(list(unique_rows.values()))
+    
+    def _calculate_relevance_scores(self, analysis: PromptAnalysis, results: List[dict]) -> None:
+        """Set the relevance score of every scraped row using the hybrid approach."""
+        # Whether the analysis is simple or complex is the same for every row, so choose the scorer once
+        if analysis.related_concepts:
             # Use semantic scoring for complex prompts
-            score = self._calculate_semantic_relevance_score(analysis, name_lower, theme_lower)
+            score_row = self._calculate_semantic_relevance_score
+        else:
+            # Use direct scoring for simple prompts
+            score_row = self._calculate_direct_relevance_score
         
-        return max(0.0, min(score, 1.0))  # Cap between 0 and 1
+        for result_data in results:
+            score = score_row(analysis, result_data['name_lower'], result_data['theme_lower'])
+            result_data['relevance_score'] = max(0.0, min(score, 1.0))  # Cap between 0 and 1
     
     def _calculate_direct_relevance_score(self, analysis: PromptAnalysis, name_lower: str, theme_lower: str) -> float:
         """Calculate relevance score for simple prompts using direct matching."""
         score = 0.0
+        lowered = analysis.lowered
         
         # Theme-specific scoring with penalties for irrelevant matches
         if analysis.theme == "race_car":
-            if any(word in name_lower for word in ["race", "racing", "formula", "f1", "nascar", "speed"]):
+            if _RACE_WORDS_RE.search(name_lower):
                 score += 0.8  # High score for race cars
-            elif any(word in name_lower for word in ["train", "railroad", "railway", "locomotive"]):
+            elif _TRAIN_WORDS_RE.search(name_lower):
                 score -= 0.5  # Penalty for train cars when looking for race cars
             elif "car" in name_lower:
                 score += 0.3  # Medium score for regular cars
                 
         elif analysis.theme == "regular_car":
-            if any(word in name_lower for word in ["car", "automobile", "vehicle"]):
-                if any(word in name_lower for word in ["train", "railroad", "railway", "locomotive"]):
+            if _CAR_WORDS_RE.search(name_lower):
+                if _TRAIN_WORDS_RE.search(name_lower):
                     score -= 0.3  # Penalty for train cars
                 else:
                     score += 0.6  # Good score for regular cars
                     
         elif analysis.theme == "train":
-            if any(word in name_lower for word in ["train", "railroad", "railway", "locomotive"]):
+            if _TRAIN_WORDS_RE.search(name_lower):
                 score += 0.8  # High score for trains
-            elif "car" in name_lower and not any(word in name_lower for word in ["race", "racing", "sports"]):
+            elif "car" in name_lower and not _FAST_CAR_WORDS_RE.search(name_lower):
                 score += 0.4  # Medium score for train cars
                 
         elif analysis.theme == "sports_car":
-            if any(word in name_lower for word in ["sports", "supercar", "ferrari", "lamborghini", "porsche"]):
+            if _SPORTS_CAR_WORDS_RE.search(name_lower):
                 score += 0.8
             elif "car" in name_lower:
                 score += 0.4
                 
         else:
             # Generic theme matching
-            if analysis.theme.lower() in name_lower or analysis.theme.lower() in theme_lower:
+            if analysis.theme_lower in name_lower or analysis.theme_lower in theme_lower:
                 score += 0.5
         
         # Color matches (higher weight for exact matches)
-        for color in analysis.colors:
-            if color.lower() in name_lower:
+        for color in lowered["colors"]:
+            if color in name_lower:
                 score += 0.3  # Increased weight for color matches
         
         # Constraint matches
-        for constraint in analysis.constraints:
-            if constraint.lower() in name_lower:
+        for constraint in lowered["constraints"]:
+            if constraint in name_lower:
                 score += 0.2  # Increased weight for constraint matches
         
         # Keyword matches in name (lower weight to avoid over-scoring)
-        for keyword in analysis.keywords:
-            if keyword.lower() in name_lower:
+        for keyword in lowered["keywords"]:
+            if keyword in name_lower:
                 score += 0.1
         
         # Bonus for exact phrase matches
@@ -688,25 +964,26 @@ class OMRSearchService:
     def _calculate_semantic_relevance_score(self, analysis: PromptAnalysis, name_lower: str, theme_lower: str) -> float:
         """Calculate relevance score for complex prompts using semantic understanding."""
         score = 0.0
+        lowered = analysis.lowered
         
         # Base score from theme matching
-        if analysis.theme != "general" and analysis.theme.lower() in name_lower:
+        if analysis.theme != "general" and analysis.theme_lower in name_lower:
             score += 0.4
         
         # Color matches
-        for color in analysis.colors:
-            if color.lower() in name_lower:
+        for color in lowered["colors"]:
+            if color in name_lower:
                 score += 0.3
         
         # Constraint matches
-        for constraint in analysis.constraints:
-            if constraint.lower() in name_lower:
+        for constraint in lowered["constraints"]:
+            if constraint in name_lower:
                 score += 0.2
         
         # Enhanced keyword matching (includes semantic expansion)
         keyword_matches = 0
-        for keyword in analysis.keywords:
-            if keyword.lower() in name_lower:
+        for keyword in lowered["keywords"]:
+            if keyword in name_lower:
                 keyword_matches += 1
                 score += 0.15  # Slightly higher weight for semantic keywords
         
@@ -717,8 +994,8 @@ class OMRSearchService:
         # Related concepts matching
         if hasattr(analysis, 'related_concepts') and analysis.related_concepts:
             concept_matches = 0
-            for concept in analysis.related_concepts:
-                if concept.lower() in name_lower:
+            for concept in lowered["related_concepts"]:
+                if concept in name_lower:
                     concept_matches += 1
                     score += 0.2  # Higher weight for semantic concept matches
             
@@ -729,8 +1006,8 @@ class OMRSearchService:
         # Search hints matching
         if hasattr(analysis, 'search_hints') and analysis.search_hints:
             hint_matches = 0
-            for hint in analysis.search_hints:
-                if hint.lower() in name_lower:
+            for hint in lowered["search_hints"]:
+                if hint in name_lower:
                     hint_matches += 1
                     score += 0.1
             
@@ -747,105 +1024,84 @@ class OMRSearchService:
     
     def _is_irrelevant_match(self, analysis: PromptAnalysis, name_lower: str, theme_lower: str) -> bool:
         """Check if a result is clearly irrelevant to the search."""
-        # Define irrelevant patterns for different themes
-        irrelevant_patterns = {
-            "race_car": ["train", "railroad", "railway", "locomotive", "house", "building", "castle"],
-            "train": ["race", "racing", "sports car", "ferrari", "lamborghini"],
-            "aircraft": ["car", "truck", "ship", "boat", "house", "building"],
-            "space": ["car", "truck", "house", "building", "train"],
-            "building": ["car", "truck", "aircraft", "spaceship", "train"]
-        }
-        
-        theme = analysis.theme
-        if theme in irrelevant_patterns:
-            for pattern in irrelevant_patterns[theme]:
-                if pattern in name_lower:
-                    return True
-        
-        return False
+        pattern = _IRRELEVANT_NAME_RES.get(analysis.theme)
+        return pattern is not None and pattern.search(name_lower) is not None
     
     async def get_model_variants(self, result: OMRSearchResult) -> List[ModelVariant]:
+        """Get available variants for a model, bounded by the service-wide fetch limit."""
+        async with self._variant_fetch_limit:
+            return await self._fetch_model_variants(result)
+    
+    async def _fetch_model_variants(self, result: OMRSearchResult) -> List[ModelVariant]:
         """Get available variants for a model using Playwright."""
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
+        # A fresh context on the shared browser instead of launching Chromium per candidate
+        context = await browser_pool.new_context()
+        page = await context.new_page()
+        
+        try:
+            # Navigate to the model detail page with shorter timeout
+            await page.goto(result.detail_url, wait_until='networkidle', timeout=15000)
             
+            # Continue as soon as a download link exists rather than sleeping for a fixed second;
+            # pages without any still get extracted once the wait gives up
             try:
-                # Navigate to the model detail page with shorter timeout
-                await page.goto(result.detail_url, wait_until='networkidle', timeout=15000)
-                
-                # Wait for the page to load
-                await page.wait_for_timeout(1000)
-                
-                # Extract download links
-                variants = await page.evaluate("""
-                    () => {
-                        const variants = [];
-                        
-                        // Look for download links
-                        const downloadLinks = document.querySelectorAll('a[href*="download"], a[href*=".mpd"], a[href*=".zip"], button[onclick*="download"]');
+                await page.wait_for_selector(_DOWNLOAD_LINK_SELECTOR, state='attached', timeout=3000)
+            except Exception:
+                # Usually a timeout on pages without download links
+                pass
+            
+            # Extract download links
+            variants = await page.evaluate("""
+                (selector) => {
+                    const variants = [];
+                    
+                    // Look for download links
+                    const downloadLinks = document.querySelectorAll(selector);
+                    
+                    for (const link of downloadLinks) {
+                        const href = link.href || link.getAttribute('onclick') || '';
+                        const text = link.textContent?.trim() || '';
                         
-                        for (const link of downloadLinks) {
-                            const href = link.href || link.getAttribute('onclick') || '';
-                            const text = link.textContent?.trim() || '';
+                        if (href && (href.includes('download') || href.includes('.mpd') || href.includes('.zip'))) {
+                            let fileType = 'mpd';
+                            if (href.includes('.zip')) fileType = 'zip';
+                            else if (href.includes('.mpd')) fileType = 'mpd';
                             
-                            if (href && (href.includes('download') || href.includes('.mpd') || href.includes('.zip'))) {
-                                let fileType = 'mpd';
-                                if (href.includes('.zip')) fileType = 'zip';
-                                else if (href.includes('.mpd')) fileType = 'mpd';
-                                
-                                const variantName = text || 'Main Model';
-                                
-                                variants.push({
-                                    name: variantName,
-                                    download_url: href,
-                                    file_type: fileType
-                                });
-                            }
+                            const variantName = text || 'Main Model';
+                            
+                            variants.push({
+                                name: variantName,
+                                download_url: href,
+                                file_type: fileType
+                            });
                         }
-                        
-                        return variants;
                     }
-                """)
-                
-                # Convert to ModelVariant objects
-                model_variants = []
-                for variant_data in variants:
-                    relevance_score = self._calculate_variant_relevance(variant_data['name'])
                     
-                    variant = ModelVariant(
-                        name=variant_data['name'],
-                        download_url=variant_data['download_url'],
-                        file_type=variant_data['file_type'],
-                        relevance_score=relevance_score
-                    )
-                    model_variants.append(variant)
-                
-                # Sort by relevance score
-                model_variants.sort(key=lambda x: x.relevance_score, reverse=True)
-                return model_variants
-                
-            except Exception as e:
-                print(f"Error getting model variants: {e}")
-                return []
-            finally:
-                await browser.close()
+                    return variants;
+                }
+            """, _DOWNLOAD_LINK_SELECTOR)
+            
+            # Score each variant, then convert to ModelVariant objects best first
+            for variant_data in variants:
+                variant_data['relevance_score'] = self._calculate_variant_relevance(variant_data['name'])
+            
+            # Sort by relevance score
+            variants.sort(key=itemgetter('relevance_score'), reverse=True)
+            return ModelVariant.validate_many(variants)
+            
+        except Exception as e:
+            print(f"Error getting model variants: {e}")
+            return []
+        finally:
+            await context.close()
     
     def _calculate_variant_relevance(self, variant_name: str) -> float:
         """Calculate relevance score for a model variant."""
-        name_lower = variant_name.lower()
-        
-        # Prefer main models
-        if 'main' in name_lower:
-            return 1.0
-        elif 'small' in name_lower:
-            return 0.8
-        elif 'large' in name_lower:
-            return 0.7
-        elif 'alternate' in name_lower:
-            return 0.5
-        else:
-            return 0.6  # Default score
+        # Prefer main models; names without any marker get the default score
+        return max(
+            (_VARIANT_SCORES[marker] for marker in _VARIANT_RE.findall(variant_name.lower())),
+            default=0.6,
+        )
     
     async def download_file(self, download_url: str, filename: str) -> str:
         """Download a file from the given URL and save it to the output directory."""
@@ -856,25 +1112,27 @@ class OMRSearchService:
             # Create file path
             file_path = self.config.output_dir / filename
             
-            # Create SSL context that doesn't verify certificates (for development)
-            ssl_context = ssl.create_default_context()
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_NONE
-            
             # Download the file
-            connector = aiohttp.TCPConnector(ssl=ssl_context)
-            async with aiohttp.ClientSession(connector=connector) as session:
-                async with session.get(download_url) as response:
-                    if response.status == 200:
-                        content = await response.read()
-                        
-                        # Write to file
-                        with open(file_path, 'wb') as f:
-                            f.write(content)
-                        
-                        return str(file_path)
-                    else:
-                        raise Exception(f"Failed to download file: HTTP {response.status}")
+            session = self._get_http_session()
+            # Large models on slow links may take longer than the session-wide total; only
+            # give up when the connection stalls
+            async with session.get(download_url, timeout=_DOWNLOAD_TIMEOUT) as response:
+                if response.status == 200:
+                    # Stream to a temporary file so memory stays at one chunk and an
+                    # interrupted download never replaces a complete file
+                    tmp_path = file_path.with_name(file_path.name + ".part")
+                    try:
+                        async with aiofiles.open(tmp_path, 'wb') as f:
+                            async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                                await f.write(chunk)
+                        os.replace(tmp_path, file_path)
+                    except BaseException:
+                        tmp_path.unlink(missing_ok=True)
+                        raise
+                    
+                    return str(file_path)
+                else:
+                    raise Exception(f"Failed to download file: HTTP {response.status}")
                         
         except Exception as e:
             raise Exception(f"Error downloading file: {str(e)}")
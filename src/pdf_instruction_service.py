@@ -1,12 +1,14 @@
 """PDF instruction generation service for LEGO models."""
 
 import asyncio
+import csv
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import List, Optional, Dict, Any
 
-from PIL import Image
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -17,6 +19,11 @@ from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from .config import Config
 from .models import InstructionGenerationResult, OMRSearchResult
 
+# Spaces and path separators in model names become underscores in PDF filenames
+_SEPARATOR_TO_UNDERSCORE = str.maketrans({" ": "_", "/": "_", "\\": "_"})
+# Anything other than letters, digits, underscores and hyphens is dropped (\w matches str.isalnum() plus "_")
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^\w-]+")
+
 
 class PDFInstructionService:
     """Service for generating PDF instruction manuals from step images and BOM."""
@@ -61,7 +68,7 @@ class PDFInstructionService:
                 
             # Use provided output_dir or default
             if output_dir is None:
-                output_dir = self.config.output_dir / "instructions"
+                output_dir = self.config.instructions_dir
             
             # Ensure output directory exists
             output_dir.mkdir(parents=True, exist_ok=True)
@@ -123,8 +130,7 @@ class PDFInstructionService:
         """Generate a descriptive filename for the PDF."""
         if model_info:
             # Clean filename: remove special characters and limit length
-            name = model_info.name.replace(" ", "_").replace("/", "_").replace("\\", "_")
-            name = "".join(c for c in name if c.isalnum() or c in "_-")
+            name = _UNSAFE_FILENAME_CHARS.sub("", model_info.name.translate(_SEPARATOR_TO_UNDERSCORE))
             name = name[:50]  # Limit length
             return f"{model_info.set_number}_{name}_Instructions.pdf"
         else:
@@ -206,16 +212,19 @@ class PDFInstructionService:
             textColor=colors.darkblue
         )
         
-        for i, image_path in enumerate(step_images, 1):
+        # Reading each image's size is file I/O, so load all step images concurrently up front
+        with ThreadPoolExecutor(max_workers=min(8, len(step_images) or 1)) as executor:
+            loaded_images = [executor.submit(self._load_step_image, image_path) for image_path in step_images]
+        
+        for i, (image_path, loaded_image) in enumerate(zip(step_images, loaded_images, strict=True), 1):
             try:
                 # Add step title
                 story.append(Paragraph(f"Step {i}", step_style))
                 story.append(Spacer(1, 0.2 * inch))
                 
                 # Add step image
-                if os.path.exists(image_path):
-                    # Resize image to fit page while maintaining aspect ratio
-                    img = self._resize_image_for_pdf(image_path)
+                img = loaded_image.result()
+                if img is not None:
                     story.append(img)
                 else:
                     story.append(Paragraph(f"Image not found: {image_path}", styles['Normal']))
@@ -281,26 +290,23 @@ class PDFInstructionService:
         
         return story
     
+    def _load_step_image(self, image_path: str) -> Optional[RLImage]:
+        """Load a step image sized for the page, or None if the file is missing."""
+        if not os.path.exists(image_path):
+            return None
+        # Resize image to fit page while maintaining aspect ratio
+        return self._resize_image_for_pdf(image_path)
+    
     def _resize_image_for_pdf(self, image_path: str) -> RLImage:
         """Resize image to fit PDF page while maintaining aspect ratio."""
         try:
-            # Open image to get dimensions
-            with Image.open(image_path) as img:
-                img_width, img_height = img.size
-                
-            # Calculate scaling factor
-            scale_x = self.image_width / img_width
-            scale_y = self.image_height / img_height
-            scale = min(scale_x, scale_y)  # Use smaller scale to fit both dimensions
-            
-            # Calculate final dimensions
-            final_width = img_width * scale
-            final_height = img_height * scale
-            
-            # Create ReportLab Image
-            rl_img = RLImage(image_path, width=final_width, height=final_height)
-            
-            return rl_img
+            # ReportLab reads the image size itself and scales it to fit both dimensions,
+            # so the file is opened once instead of a second time through PIL
+            image = RLImage(image_path, width=self.image_width, height=self.image_height, kind='proportional')
+            # RLImage defers reading the file until it is first sized, so size it here to do that
+            # read on the loading thread rather than during doc.build()
+            image.wrap(self.image_width, self.image_height)
+            return image
             
         except Exception as e:
             print(f"   ⚠️  Error resizing image {image_path}: {e}")
@@ -310,20 +316,16 @@ class PDFInstructionService:
     def _read_bom_csv(self, csv_path: str) -> List[List[str]]:
         """Read BOM CSV and return data as list of lists."""
         try:
-            import csv
-            bom_data = []
-            
-            with open(csv_path, 'r', encoding='utf-8') as f:
+            with open(csv_path, 'r', encoding='utf-8', newline='') as f:
                 reader = csv.reader(f)
                 next(reader)  # Skip header row
                 
-                for row in reader:
-                    if len(row) >= 4:  # Ensure we have at least the required columns
-                        # Truncate part names that are too long
-                        part_name = row[0][:40] + "..." if len(row[0]) > 40 else row[0]
-                        bom_data.append([part_name, row[1], row[2], row[3]])
-            
-            return bom_data
+                # Keep rows with at least the required columns, truncating part names that are too long
+                return [
+                    [row[0][:40] + "..." if len(row[0]) > 40 else row[0], row[1], row[2], row[3]]
+                    for row in reader
+                    if len(row) >= 4
+                ]
             
         except Exception as e:
             print(f"   ⚠️  Error reading BOM CSV: {e}")
@@ -4,16 +4,21 @@
 import asyncio
 import os
 import sys
-from pathlib import Path
+from typing import BinaryIO, List, Optional
 
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent / "src"))
+import orjson
 
 from src.config import Config
 from src.leocad_service import LeoCADService
 
 
-async def test_leocad_service():
+def record_step(json_sink: Optional[BinaryIO], step: int, name: str, ok: bool, **details):
+    """Append one step outcome as an NDJSON line when a JSON sink was requested."""
+    if json_sink is not None:
+        json_sink.write(orjson.dumps({"step": step, "name": name, "ok": ok, **details}) + b"\n")
+
+
+async def test_leocad_service(json_sink: Optional[BinaryIO] = None):
     """Test the LeoCAD service functionality."""
     print("🧪 Testing LeoCAD Service Integration")
     print("=" * 50)
@@ -26,6 +31,7 @@ async def test_leocad_service():
     print("1. Checking LeoCAD availability...")
     leocad_available = service._check_leocad_available()
     print(f"   LeoCAD CLI available: {'✅' if leocad_available else '❌'}")
+    record_step(json_sink, 1, "leocad_available", leocad_available, executable=service._leocad_executable)
     
     if leocad_available:
         print(f"   LeoCAD executable: {service._leocad_executable}")
@@ -38,19 +44,24 @@ async def test_leocad_service():
     print("\n2. Checking LDraw library...")
     ldraw_path = service.ldraw_path
     print(f"   LDraw path: {ldraw_path or 'Not found'}")
+    part_count = None
     
     if ldraw_path:
         # Check if parts directory exists
         parts_dir = os.path.join(ldraw_path, "parts")
-        parts_exists = os.path.exists(parts_dir)
+        parts_exists = os.path.isdir(parts_dir)
         print(f"   Parts directory exists: {'✅' if parts_exists else '❌'}")
         if parts_exists:
             try:
-                part_count = len([f for f in os.listdir(parts_dir) if f.endswith('.dat')])
+                # Count while scanning instead of building a list of ~20k part filenames
+                with os.scandir(parts_dir) as entries:
+                    part_count = sum(1 for entry in entries if entry.name.endswith('.dat'))
                 print(f"   Number of part files: {part_count}")
             except PermissionError:
                 print("   ⚠️  Permission denied accessing parts directory")
     
+    record_step(json_sink, 2, "ldraw_library", bool(ldraw_path), ldraw_path=ldraw_path, part_count=part_count)
+    
     if not ldraw_path:
         print("   ⚠️  LDraw library not found. Please install LDraw or set LDRAW_PATH environment variable.")
         print("   Download from: https://www.ldraw.org/")
@@ -59,22 +70,36 @@ async def test_leocad_service():
     # Test 3: Check if we have any existing MPD files to test with
     print("\n3. Looking for existing MPD files to test...")
     output_dir = config.output_dir
-    mpd_files = list(output_dir.glob("*.mpd"))
+    try:
+        # A plain suffix check over one scandir pass, without pathlib's glob machinery
+        with os.scandir(output_dir) as entries:
+            mpd_files = [entry for entry in entries if entry.name.endswith(".mpd") and entry.is_file()]
+    except FileNotFoundError:
+        mpd_files = []
+    record_step(json_sink, 3, "mpd_files", bool(mpd_files), count=len(mpd_files))
     
     if not mpd_files:
         print("   No MPD files found in output directory.")
         print("   Please run the model retrieval first to download a model.")
         return False
     
-    # Test with the first MPD file
-    test_mpd = mpd_files[0]
-    print(f"   Testing with: {test_mpd.name}")
+    print(f"   Found {len(mpd_files)} MPD file(s)")
     
-    # Test 4: Check if MPD has steps
-    print("\n4. Checking MPD file for steps...")
-    has_steps, step_count = service._check_mpd_has_steps(str(test_mpd))
+    # Test 4: Check every MPD for steps, reading the files concurrently
+    print("\n4. Checking MPD files for steps...")
+    step_checks = await asyncio.gather(
+        *(asyncio.to_thread(service._check_mpd_has_steps, entry.path) for entry in mpd_files)
+    )
+    
+    # Test with the first MPD that has steps, or the first MPD if none do
+    test_mpd, (has_steps, step_count) = next(
+        ((entry, check) for entry, check in zip(mpd_files, step_checks, strict=True) if check[0]),
+        (mpd_files[0], step_checks[0])
+    )
+    print(f"   Testing with: {test_mpd.name}")
     print(f"   Has steps: {'✅' if has_steps else '❌'}")
     print(f"   Step count: {step_count}")
+    record_step(json_sink, 4, "mpd_steps", has_steps, mpd=test_mpd.path, step_count=step_count)
     
     if not has_steps:
         print("   ⚠️  This MPD file has no steps, so instruction generation will be limited.")
@@ -82,9 +107,13 @@ async def test_leocad_service():
     # Test 5: Try to generate instructions
     print("\n5. Testing instruction generation...")
     try:
-        result = await service.generate_instructions(str(test_mpd))
+        result = await service.generate_instructions(test_mpd.path)
         
         print(f"   Success: {'✅' if result.success else '❌'}")
+        record_step(
+            json_sink, 5, "instruction_generation", result.success,
+            step_images=len(result.step_images), error=result.error_message
+        )
         
         if result.success:
             print(f"   Step images: {len(result.step_images)} files")
@@ -99,15 +128,27 @@ async def test_leocad_service():
             
     except Exception as e:
         print(f"   ❌ Error during instruction generation: {e}")
+        record_step(json_sink, 5, "instruction_generation", False, error=str(e))
         return False
     
     print("\n✅ LeoCAD integration test completed!")
     return True
 
 
-async def main():
+def parse_json_path(args: List[str]) -> Optional[str]:
+    """Return the PATH given as --json PATH, if any."""
+    if "--json" not in args:
+        return None
+    index = args.index("--json")
+    if index + 1 >= len(args):
+        print("Usage: python test_leocad_integration.py [--json PATH]")
+        sys.exit(1)
+    return args[index + 1]
+
+
+async def main(json_sink: Optional[BinaryIO] = None):
     """Main test function."""
-    success = await test_leocad_service()
+    success = await test_leocad_service(json_sink)
     
     if success:
         print("\n🎉 All tests passed! LeoCAD integration is working.")
@@ -122,4 +163,11 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # Optional machine-readable report: --json PATH appends one NDJSON line per step.
+    # The sink is opened here, outside the event loop.
+    json_path = parse_json_path(sys.argv[1:])
+    if json_path:
+        with open(json_path, "ab", buffering=0) as json_sink:
+            asyncio.run(main(json_sink))
+    else:
+        asyncio.run(main())